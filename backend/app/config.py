@@ -38,12 +38,14 @@ class Settings(BaseSettings):
     # OCR 图像预处理配置
     ocr_image_dpi: int = 300  # PDF转图片DPI
     ocr_image_enhance: bool = True  # 图像增强 - 启用以提升准确率
+    ocr_denoise_mode: str = "bilateral"  # 增强时的去噪方式: bilateral(快), median(最快), nlmeans(效果最好但很慢)
     ocr_parallel_pages: int = 4  # 并行处理页数
     ocr_cache_enabled: bool = True  # 启用结果缓存
     ocr_cache_ttl: int = 3600  # 缓存时间（秒）
     
     # TTS 配置
     tts_voice: str = "zh-CN-XiaoxiaoNeural"  # Edge TTS 中文女声
+    tts_max_parallel: int = 3  # 流式语音对话中并行合成的句子数
     
     # RAG 配置
     embedding_model: str = "moka-ai/m3e-base"  # 中文友好的嵌入模型，支持多语言
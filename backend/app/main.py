@@ -180,6 +180,12 @@ async def shutdown_event():
         except Exception as e:
             logger.error(f"❌ Nacos服务注销异常: {e}")
     
+    # 删除文件池中的临时文件，关闭语音线程池和LLM连接池
+    from app.utils import VOICE_POOL, LLMClient, flush_temp_file_cleanup
+    await flush_temp_file_cleanup()
+    VOICE_POOL.shutdown(wait=False)
+    await LLMClient.close()
+    
     # 清理临时文件
     try:
         from app.services.tts_service import tts_service
@@ -2,7 +2,7 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Web
 from fastapi.responses import JSONResponse, StreamingResponse, Response
 from typing import Optional, Dict, List, Any
 import logging
-from app.services.funaudio_service_real import FunAudioLLMService
+from app.services.funaudio_service_real import funaudio_service
 from app.services.tts_service import tts_service
 import json
 import base64
@@ -15,10 +15,7 @@ from app.utils import clean_text_for_speech, split_text_for_tts, synthesize_spee
 import re
 import hashlib
 from app.services.voice_websocket_service import voice_websocket_service
-from app.services.voice_stream_service import voice_stream_service
-
-# 创建 FunAudioLLM 服务实例
-funaudio_service = FunAudioLLMService()
+from app.services.voice_stream_service import voice_stream_service, TRANSPORT_SSE_JSON, AUDIO_STREAM_BOUNDARY
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
@@ -293,7 +290,8 @@ async def voice_websocket(websocket: WebSocket):
     
     支持实时语音对话和流式音频传输
     消息格式:
-    - 配置: {"type": "config", "session_id": "optional", "language": "auto"}
+    - 配置: {"type": "config", "session_id": "optional", "language": "auto", "audio_framing": "split|envelope"}
+      audio_framing 为 "envelope" 时音频元数据和音频合并为一个二进制帧，格式见 AUDIO_ENVELOPE_FORMAT
     - 流式音频: 直接发送二进制音频数据
     - 语音对话: {"type": "voice_chat", "session_id": "optional", "language": "auto"} + 二进制数据
     - 状态: {"type": "status", "status": "connected|listening|processing|error"}
@@ -308,7 +306,7 @@ async def voice_websocket(websocket: WebSocket):
             "status": "connected",
             "message": "语音WebSocket连接已建立，支持流式音频传输",
             "session_id": voice_websocket_service.connection_manager.get_session_id(websocket),
-            "features": ["stream_audio", "binary_transfer", "real_time"],
+            "features": ["stream_audio", "binary_transfer", "real_time", "audio_envelope"],
             "timestamp": voice_websocket_service.connection_manager.get_session_id(websocket)
         })
         
@@ -317,11 +315,23 @@ async def voice_websocket(websocket: WebSocket):
             try:
                 # 尝试接收消息
                 data = await websocket.receive()
+                if data["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(data.get("code", 1000))
                 if "bytes" in data:
                     # 处理二进制消息（音频数据）
                     binary_data = data["bytes"]
                     await voice_websocket_service.handle_stream_audio_data(websocket, binary_data)
+                elif "text" in data:
+                    # 处理JSON控制消息
+                    message = json.loads(data["text"])
+                    message_type = message.get("type")
+                    if message_type == "config":
+                        voice_websocket_service.connection_manager.set_config(websocket, message)
+                    elif message_type == "ping":
+                        await websocket.send_json({"type": "pong"})
                         
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 logger.error(f"❌ 处理WebSocket消息失败: {e}")
                 await websocket.send_json({
@@ -417,4 +427,59 @@ async def voice_chat_stream(
         
     except Exception as e:
         logger.error(f"流式语音聊天请求失败: {e}")
-        raise HTTPException(status_code=500, detail=f"处理请求失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"处理请求失败: {str(e)}")
+
+@router.post("/stream_audio")
+async def voice_stream_audio(
+    audio: UploadFile = File(...),
+    session_id: str = Form(...),
+    language: str = Form(default="auto"),
+    transport: str = Query(default="multipart")
+):
+    """
+    流式语音聊天 - 直接返回原始音频分块
+    
+    默认以 multipart/mixed 分块传输MP3音频，每个分块头部包含 X-Chunk-Id
+    和URL编码的 X-Chunk-Text，避免base64编码带来的体积和CPU开销。
+    只支持EventSource的客户端可使用 ?transport=sse-json 获得与 /chat/stream 相同的SSE格式。
+    """
+    try:
+        logger.info(f"🎤 开始流式音频处理，会话ID: {session_id}, 传输方式: {transport}")
+        
+        audio_data = await audio.read()
+        if not validate_audio_data(audio_data)["valid"]:
+            raise HTTPException(status_code=400, detail="音频数据为空")
+        
+        if transport == TRANSPORT_SSE_JSON:
+            return StreamingResponse(
+                voice_stream_service.generate_streaming_response(
+                    audio_data=audio_data,
+                    session_id=session_id,
+                    language=language
+                ),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive",
+                    "X-Accel-Buffering": "no"
+                }
+            )
+        
+        return StreamingResponse(
+            voice_stream_service.generate_audio_stream(
+                audio_data=audio_data,
+                session_id=session_id,
+                language=language
+            ),
+            media_type=f"multipart/mixed; boundary={AUDIO_STREAM_BOUNDARY}",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"流式音频请求失败: {e}")
+        raise HTTPException(status_code=500, detail=f"处理请求失败: {str(e)}")
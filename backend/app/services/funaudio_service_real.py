@@ -3,6 +3,7 @@
 集成阿里巴巴 SenseVoice 模型进行高性能语音识别
 """
 
+import os
 import logging
 import torch
 import numpy as np
@@ -26,7 +27,9 @@ from app.utils import (
     MessageProcessor, get_timestamp,
     extract_sensevoice_emotion_info,
     extract_sensevoice_event_info,
-    clean_sensevoice_text
+    clean_sensevoice_text,
+    extract_sensevoice_all,
+    VOICE_POOL
 )
 
 logger = logging.getLogger(__name__)
@@ -94,6 +97,15 @@ class FunAudioLLMService:
             
             self.model = AutoModel(**model_kwargs)
             
+            # CUDA上预热，提前完成cuDNN算法搜索和内核初始化
+            if device_config["device"].startswith("cuda"):
+                await asyncio.get_running_loop().run_in_executor(
+                    VOICE_POOL,
+                    DeviceManager.warmup_model,
+                    self._warmup_infer,
+                    self._build_warmup_inputs()
+                )
+            
             self.is_initialized = True
             logger.info("✅ FunAudioLLM SenseVoice模型加载成功")
             return True
@@ -103,6 +115,31 @@ class FunAudioLLMService:
             self.is_initialized = False
             return False
     
+    @staticmethod
+    def _build_warmup_inputs() -> List[np.ndarray]:
+        """构建预热用的16kHz音频（时长由 FUNAUDIO_WARMUP_SECONDS 配置，逗号分隔）"""
+        durations = os.getenv("FUNAUDIO_WARMUP_SECONDS", "1,5")
+        inputs = []
+        for duration in durations.split(","):
+            duration = duration.strip()
+            if not duration:
+                continue
+            t = np.arange(int(float(duration) * 16000), dtype=np.float32) / 16000
+            inputs.append((0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+        return inputs
+    
+    def _warmup_infer(self, audio: np.ndarray):
+        """预热推理，参数与正式识别保持一致"""
+        return self.model.generate(
+            input=audio,
+            cache={},
+            language="auto",
+            use_itn=True,
+            batch_size_s=60,
+            merge_vad=True,
+            merge_length_s=15,
+        )
+    
     async def voice_recognition(self, audio_data: bytes, language: str = "auto") -> Dict[str, Any]:
         """
         高性能语音识别，支持情感分析和声学事件检测
@@ -133,57 +170,48 @@ class FunAudioLLMService:
                     "recognized_text": ""
                 }
             
-            try:
-                # 使用SenseVoice进行识别
-                result = self.model.generate(
-                    input=processed_audio_path,
-                    cache={},
-                    language=language,  # "auto", "zh", "en", "yue", "ja", "ko"
-                    use_itn=True,  # 启用逆文本标准化
-                    batch_size_s=60,
-                    merge_vad=True,  # 合并VAD结果
-                    merge_length_s=15,
-                )
-                
-                if not result or len(result) == 0:
-                    return {
-                        "success": False,
-                        "error": "语音识别返回空结果",
-                        "engine": "FunAudioLLM-SenseVoice",
-                        "recognized_text": ""
-                    }
-                
-                # 处理识别结果
-                raw_text = result[0]["text"]
-                processed_text = rich_transcription_postprocess(raw_text)
-                
-                # 解析情感和事件信息
-                emotion_info = self._extract_emotion_info(processed_text)
-                event_info = self._extract_event_info(processed_text)
-                clean_text = self._clean_text(processed_text)
-                
-                # 获取置信度
-                confidence = result[0].get("confidence", 1.0)
-                
-                logger.info(f"✅ 语音识别成功: {clean_text[:50]}")
-                
+            # 使用SenseVoice进行识别（在语音线程池中执行，避免阻塞事件循环）
+            # 临时文件在线程池任务结束时归还，协程被取消时也不会在推理过程中被复用
+            result = await asyncio.get_running_loop().run_in_executor(
+                VOICE_POOL, self._generate_and_release, processed_audio_path, language
+            )
+            
+            if not result or len(result) == 0:
                 return {
-                    "success": True,
-                    "recognized_text": clean_text,
-                    "raw_text": raw_text,
-                    "processed_text": processed_text,
-                    "emotion": emotion_info,
-                    "events": event_info,
-                    "language": language,
+                    "success": False,
+                    "error": "语音识别返回空结果",
                     "engine": "FunAudioLLM-SenseVoice",
-                    "confidence": confidence,
-                    "model_name": self.model_name,
-                    "device": self.device
+                    "recognized_text": ""
                 }
-                
-            finally:
-                # 清理临时文件
-                AudioProcessor.cleanup_temp_file(processed_audio_path)
+            
+            # 处理识别结果
+            raw_text = result[0]["text"]
+            processed_text = rich_transcription_postprocess(raw_text)
+            
+            # 解析情感和事件信息（一次扫描完成）
+            extracted = extract_sensevoice_all(processed_text)
+            emotion_info = extracted["emotion"]
+            event_info = extracted["events"]
+            clean_text = extracted["clean_text"]
+            
+            # 获取置信度
+            confidence = result[0].get("confidence", 1.0)
+            
+            logger.info(f"✅ 语音识别成功: {clean_text[:50]}")
+            
+            return {
+                "success": True,
+                "recognized_text": clean_text,
+                "raw_text": raw_text,
+                "processed_text": processed_text,
+                "emotion": emotion_info,
+                "events": event_info,
+                "language": language,
+                "engine": "FunAudioLLM-SenseVoice",
+                "confidence": confidence,
+                "model_name": self.model_name,
+                "device": self.device
+            }
             
         except Exception as e:
             logger.error(f"❌ FunAudioLLM语音识别失败: {e}")
@@ -194,6 +222,22 @@ class FunAudioLLMService:
                 "recognized_text": ""
             }
     
+    def _generate_and_release(self, audio_path: str, language: str):
+        """在语音线程池中识别音频文件，识别结束后才归还临时文件"""
+        try:
+            return self.model.generate(
+                input=audio_path,
+                cache={},
+                language=language,  # "auto", "zh", "en", "yue", "ja", "ko"
+                use_itn=True,  # 启用逆文本标准化
+                batch_size_s=60,
+                merge_vad=True,  # 合并VAD结果
+                merge_length_s=15,
+            )
+        finally:
+            # 工作线程中没有事件循环，会同步清理
+            AudioProcessor.cleanup_temp_file(audio_path)
+    
     def _extract_emotion_info(self, processed_text: str) -> Dict[str, Any]:
         """从处理后的文本中提取情感信息"""
         return extract_sensevoice_emotion_info(processed_text)
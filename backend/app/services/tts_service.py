@@ -20,36 +20,42 @@ class TTSService:
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
     
+    def _prepare_text(self, text: str) -> str:
+        """验证并清理待合成文本，返回可安全交给edge-tts的文本"""
+        # 严格的输入验证
+        if not text or not isinstance(text, str):
+            raise ValueError("文本输入为空或类型错误")
+        
+        # 清理和验证文本内容
+        cleaned_text = text.strip()
+        if not cleaned_text:
+            raise ValueError("清理后的文本为空")
+        
+        # 检查文本长度
+        if len(cleaned_text) < 1:
+            raise ValueError("文本长度过短")
+            
+        # 检查是否只包含标点符号和空白字符
+        # 移除所有标点符号和空白字符，检查是否还有内容
+        text_without_punctuation = re.sub(r'[^\w\u4e00-\u9fff]', '', cleaned_text)
+        if not text_without_punctuation:
+            raise ValueError("文本只包含标点符号和空白字符，无法进行语音合成")
+        
+        # 检查文本是否包含无效字符（可能导致edge-tts失败的字符）
+        # 移除或替换一些可能导致问题的特殊字符
+        safe_text = re.sub(r'[^\w\s\u4e00-\u9fff\u3000-\u303f\uff00-\uffef.,!?;:()"""''，。！？；：（）【】《》]', '', cleaned_text)
+        if not safe_text.strip():
+            raise ValueError("文本包含过多特殊字符，无法进行语音合成")
+            
+        # 记录要合成的文本（用于调试）
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("🔊 TTS合成文本: %r%s", safe_text[:100], '...' if len(safe_text) > 100 else '')
+        return safe_text
+    
     async def text_to_speech(self, text: str, voice: str = None, rate: str = None, volume: str = None) -> Tuple[str, int]:
         """将文本转换为语音"""
         try:
-            # 严格的输入验证
-            if not text or not isinstance(text, str):
-                raise ValueError("文本输入为空或类型错误")
-            
-            # 清理和验证文本内容
-            cleaned_text = text.strip()
-            if not cleaned_text:
-                raise ValueError("清理后的文本为空")
-            
-            # 检查文本长度
-            if len(cleaned_text) < 1:
-                raise ValueError("文本长度过短")
-                
-            # 检查是否只包含标点符号和空白字符
-            # 移除所有标点符号和空白字符，检查是否还有内容
-            text_without_punctuation = re.sub(r'[^\w\u4e00-\u9fff]', '', cleaned_text)
-            if not text_without_punctuation:
-                raise ValueError("文本只包含标点符号和空白字符，无法进行语音合成")
-            
-            # 检查文本是否包含无效字符（可能导致edge-tts失败的字符）
-            # 移除或替换一些可能导致问题的特殊字符
-            safe_text = re.sub(r'[^\w\s\u4e00-\u9fff\u3000-\u303f\uff00-\uffef.,!?;:()"""''，。！？；：（）【】《》]', '', cleaned_text)
-            if not safe_text.strip():
-                raise ValueError("文本包含过多特殊字符，无法进行语音合成")
-                
-            # 记录要合成的文本（用于调试）
-            logger.info(f"🔊 TTS合成文本: {repr(safe_text[:100])}{'...' if len(safe_text) > 100 else ''}")
+            safe_text = self._prepare_text(text)
             
             # 使用传入参数或默认值
             voice = voice or self.voice
@@ -80,7 +86,7 @@ class TTSService:
                 logger.warning(f"⚠️ 生成的音频文件过小: {file_size} 字节")
                 # 不抛出异常，但记录警告
             
-            logger.info(f"✅ TTS转换成功: {audio_filename}, 大小: {file_size} 字节")
+            logger.info("✅ TTS转换成功: %s, 大小: %d 字节", audio_filename, file_size)
             return audio_path, file_size
             
         except ValueError as ve:
@@ -91,6 +97,40 @@ class TTSService:
             logger.error(f"❌ TTS转换失败: {e}, 原始文本: {repr(text[:200] if text else 'None')}")
             raise Exception(f"TTS转换失败: {str(e)}")
     
+    async def synthesize_to_bytes(self, text: str, voice: str = None, rate: str = None, volume: str = None) -> bytes:
+        """将文本转换为语音并直接返回音频字节，不经过临时文件"""
+        try:
+            safe_text = self._prepare_text(text)
+            
+            communicate = edge_tts.Communicate(
+                safe_text,
+                voice or self.voice,
+                rate=rate or self.rate,
+                volume=volume or self.volume
+            )
+            
+            # 在内存中收集音频数据
+            audio_parts = []
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    audio_parts.append(chunk["data"])
+            audio_data = b"".join(audio_parts)
+            
+            if not audio_data:
+                raise Exception("音频数据生成失败")
+            if len(audio_data) < 100:  # 音频数据应该至少有100字节
+                logger.warning(f"⚠️ 生成的音频数据过小: {len(audio_data)} 字节")
+            
+            logger.info("✅ TTS转换成功, 大小: %d 字节", len(audio_data))
+            return audio_data
+            
+        except ValueError as ve:
+            logger.warning(f"⚠️ TTS输入验证失败: {ve}, 原始文本: {repr(text[:200] if text else 'None')}")
+            raise ve
+        except Exception as e:
+            logger.error(f"❌ TTS转换失败: {e}, 原始文本: {repr(text[:200] if text else 'None')}")
+            raise Exception(f"TTS转换失败: {str(e)}")
+    
     async def get_available_voices(self):
         """获取可用的语音列表"""
         try:
@@ -4,63 +4,98 @@
 提供WebSocket连接管理、流式音频处理等功能
 """
 
-from fastapi import WebSocket
-from typing import Dict, List
+from fastapi import WebSocket, WebSocketDisconnect
+from typing import Dict, Optional
 import logging
 import asyncio
-import json
-import base64
-from app.services.funaudio_service_real import FunAudioLLMService
+import time
+import uuid
+import orjson
+from app.config import settings
+from app.services.funaudio_service_real import funaudio_service
 from app.services.lm_studio_service import lm_studio_service
 from app.models.schemas import ChatRequest
-from app.utils import clean_text_for_speech, synthesize_speech_chunk
+from app.utils import (
+    OrderedSpeechSynthesizer, SpeechChunk, VOICE_CHAT_REQUEST_DEFAULTS,
+    produce_speech_sentences, emit_speech_chunks
+)
 
 logger = logging.getLogger(__name__)
 
+# 音频块发送方式（连接配置 audio_framing）
+AUDIO_FRAMING_SPLIT = "split"
+AUDIO_FRAMING_ENVELOPE = "envelope"
+
+AUDIO_ENVELOPE_FORMAT = """
+单帧二进制音频信封（audio_framing = "envelope"）:
+
+    [4字节小端无符号整数 N][N字节UTF-8 JSON元数据][MP3音频字节]
+
+元数据与 audio_chunk_info 消息相同（type 为 "audio_chunk"），
+客户端读取前4字节得到元数据长度，解析JSON后其余字节即为音频。
+默认（"split"）仍先发送JSON audio_chunk_info 消息，再发送一帧纯音频二进制数据。
+"""
+
+
+def _pack_audio_envelope(meta: Dict, audio: bytes) -> bytes:
+    """按 AUDIO_ENVELOPE_FORMAT 将元数据和音频打包为一个二进制帧"""
+    meta_bytes = orjson.dumps(meta)
+    return len(meta_bytes).to_bytes(4, "little") + meta_bytes + audio
+
+class ConnectionState:
+    """单个WebSocket连接的状态"""
+    
+    __slots__ = ("session_id", "config")
+    
+    def __init__(self, session_id: str, config: Optional[Dict] = None):
+        self.session_id = session_id
+        self.config = config if config is not None else {}
+
+
 class VoiceConnectionManager:
     """WebSocket连接管理器"""
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.connection_configs: Dict[WebSocket, Dict] = {}
-        self.connection_sessions: Dict[WebSocket, str] = {}
+        self.connections: Dict[WebSocket, ConnectionState] = {}
+    
+    def __len__(self) -> int:
+        return len(self.connections)
     
     async def connect(self, websocket: WebSocket):
         """建立WebSocket连接"""
         await websocket.accept()
-        self.active_connections.append(websocket)
         # 为每个连接生成唯一的会话ID
-        session_id = f"ws-session-{len(self.active_connections)}-{asyncio.get_event_loop().time()}"
-        self.connection_sessions[websocket] = session_id
-        logger.info(f"🔌 新的语音WebSocket连接: {len(self.active_connections)}个活跃连接, 会话ID: {session_id}")
+        session_id = f"ws-{uuid.uuid4().hex[:12]}"
+        self.connections[websocket] = ConnectionState(session_id)
+        logger.info(f"🔌 新的语音WebSocket连接: {len(self.connections)}个活跃连接, 会话ID: {session_id}")
     
     def disconnect(self, websocket: WebSocket):
         """断开WebSocket连接"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        if websocket in self.connection_configs:
-            del self.connection_configs[websocket]
-        if websocket in self.connection_sessions:
-            del self.connection_sessions[websocket]
-        logger.info(f"🔌 语音WebSocket连接断开: {len(self.active_connections)}个活跃连接")
+        self.connections.pop(websocket, None)
+        logger.info(f"🔌 语音WebSocket连接断开: {len(self.connections)}个活跃连接")
     
     def set_config(self, websocket: WebSocket, config: Dict):
         """设置连接配置"""
-        self.connection_configs[websocket] = config
+        state = self.connections.get(websocket)
+        if state is not None:
+            state.config = config
     
     def get_config(self, websocket: WebSocket) -> Dict:
         """获取连接配置"""
-        return self.connection_configs.get(websocket, {})
+        state = self.connections.get(websocket)
+        return state.config if state is not None else {}
     
     def get_session_id(self, websocket: WebSocket) -> str:
         """获取会话ID"""
-        return self.connection_sessions.get(websocket, "default")
+        state = self.connections.get(websocket)
+        return state.session_id if state is not None else "default"
 
 class VoiceWebSocketService:
     """语音WebSocket服务"""
     
     def __init__(self):
-        self.funaudio_service = FunAudioLLMService()
+        # 复用全局FunAudioLLM实例，避免重复加载模型
+        self.funaudio_service = funaudio_service
         self.connection_manager = VoiceConnectionManager()
     
     async def handle_stream_audio_data(self, websocket: WebSocket, audio_data: bytes):
@@ -79,7 +114,7 @@ class VoiceWebSocketService:
                 "status": "processing",
                 "message": "正在处理流式音频数据",
                 "audio_size": len(audio_data),
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": time.monotonic()
             })
             
             if len(audio_data) == 0:
@@ -96,7 +131,7 @@ class VoiceWebSocketService:
                     "type": "error",
                     "error": "语音识别失败",
                     "details": recognition_result.get("error", "未知错误"),
-                    "timestamp": asyncio.get_event_loop().time()
+                    "timestamp": time.monotonic()
                 })
                 return
             
@@ -107,7 +142,7 @@ class VoiceWebSocketService:
                     "type": "recognition_result",
                     "success": False,
                     "message": "未识别到有效语音内容",
-                    "timestamp": asyncio.get_event_loop().time()
+                    "timestamp": time.monotonic()
                 })
                 return
             
@@ -117,18 +152,20 @@ class VoiceWebSocketService:
                 "success": True,
                 "recognized_text": recognized_text,
                 "emotion": recognition_result.get("emotion", {}),
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": time.monotonic()
             })
             
             # 开始流式AI对话处理
             await self.process_stream_ai_response(websocket, recognized_text, session_id)
             
+        except WebSocketDisconnect:
+            raise
         except Exception as e:
             logger.error(f"❌ 处理流式音频数据失败: {e}")
             await websocket.send_json({
                 "type": "error",
                 "error": f"处理音频数据失败: {str(e)}",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": time.monotonic()
             })
 
     async def process_stream_ai_response(self, websocket: WebSocket, user_text: str, session_id: str):
@@ -138,145 +175,87 @@ class VoiceWebSocketService:
             await websocket.send_json({
                 "type": "ai_thinking",
                 "message": "AI正在思考回复...",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": time.monotonic()
             })
             
-            chat_request = ChatRequest(
-                message=user_text,
-                history=[],  # 可以根据需要添加历史记录
-                temperature=0.7,
-                max_tokens=2048,
-                stream=True
-            )
+            chat_request = ChatRequest.model_construct(message=user_text, **VOICE_CHAT_REQUEST_DEFAULTS)
             
             # 流式AI对话 + 实时TTS
-            text_buffer = ""
-            processed_text_length = 0
-            chunk_counter = 0
+            # 发送队列中的消息：dict 以JSON发送，bytes 以二进制帧发送
+            outgoing: asyncio.Queue = asyncio.Queue()
             
-            async for ai_chunk in lm_studio_service.chat_completion_stream(chat_request):
-                if ai_chunk.strip():
-                    text_buffer += ai_chunk
-                    
-                    # 发送AI生成的文字片段
-                    await websocket.send_json({
-                        "type": "ai_text_chunk",
-                        "content": ai_chunk,
-                        "timestamp": asyncio.get_event_loop().time()
-                    })
-                    
-                    # 清理思考标签
-                    cleaned_buffer = clean_text_for_speech(text_buffer)
-                    
-                    # 只处理新增的部分，避免重复处理
-                    if len(cleaned_buffer) > processed_text_length:
-                        new_text = cleaned_buffer[processed_text_length:]
-                        
-                        # 检查是否可以形成完整句子进行TTS
-                        sentence_endings = ['。', '！', '？', '.', '!', '?', '\n']
-                        last_sentence_end = -1
-                        
-                        for i, char in enumerate(new_text):
-                            if char in sentence_endings:
-                                last_sentence_end = i
-                        
-                        # 如果找到完整句子，进行TTS合成
-                        if last_sentence_end >= 0:
-                            sentence_to_process = new_text[:last_sentence_end + 1].strip()
-                            
-                            if sentence_to_process and len(sentence_to_process) >= 3:
-                                try:
-                                    logger.info(f"🎵 TTS处理句子: {repr(sentence_to_process[:50])}")
-                                    
-                                    # TTS合成
-                                    audio_buffer = await synthesize_speech_chunk(sentence_to_process)
-                                    if audio_buffer:
-                                        # 直接发送二进制音频数据
-                                        await websocket.send_json({
-                                            "type": "audio_chunk_info",
-                                            "text": sentence_to_process,
-                                            "chunk_id": chunk_counter,
-                                            "audio_size": len(audio_buffer),
-                                            "timestamp": asyncio.get_event_loop().time()
-                                        })
-                                        
-                                        # 发送二进制音频数据
-                                        await websocket.send_bytes(audio_buffer)
-                                        chunk_counter += 1
-                                        
-                                except Exception as e:
-                                    logger.error(f"❌ 流式TTS合成异常: {e}")
-                                    await websocket.send_json({
-                                        "type": "tts_error",
-                                        "message": f"语音合成失败: {str(e)}",
-                                        "text": sentence_to_process[:100],
-                                        "timestamp": asyncio.get_event_loop().time()
-                                    })
-                            
-                            processed_text_length += last_sentence_end + 1
-                        
-                        # 处理长文本块
-                        elif len(new_text) > 100:
-                            split_chars = [' ', '，', ',', '、', '；', ';']
-                            best_split = -1
-                            
-                            for i in range(min(80, len(new_text) - 1), 20, -1):
-                                if new_text[i] in split_chars:
-                                    best_split = i
-                                    break
-                            
-                            if best_split > 20:
-                                chunk_to_process = new_text[:best_split + 1].strip()
-                                
-                                if chunk_to_process:
-                                    try:
-                                        audio_buffer = await synthesize_speech_chunk(chunk_to_process)
-                                        if audio_buffer:
-                                            await websocket.send_json({
-                                                "type": "audio_chunk_info",
-                                                "text": chunk_to_process,
-                                                "chunk_id": chunk_counter,
-                                                "audio_size": len(audio_buffer),
-                                                "timestamp": asyncio.get_event_loop().time()
-                                            })
-                                            await websocket.send_bytes(audio_buffer)
-                                            chunk_counter += 1
-                                            
-                                    except Exception as e:
-                                        logger.error(f"❌ 长文本TTS异常: {e}")
-                                
-                                processed_text_length += best_split + 1
+            framing = self.connection_manager.get_config(websocket).get("audio_framing", AUDIO_FRAMING_SPLIT)
+            
+            async def send_text(content: str):
+                await outgoing.put({
+                    "type": "ai_text_chunk",
+                    "content": content,
+                    "timestamp": time.monotonic()
+                })
             
-            # 处理剩余文本
-            if text_buffer.strip():
-                cleaned_buffer = clean_text_for_speech(text_buffer)
+            # stream_complete.total_chunks 与原协议一致，不计入最后的剩余文本块
+            sentence_chunks = 0
+            
+            async def send_audio(chunk: SpeechChunk, chunk_id: int):
+                nonlocal sentence_chunks
+                audio_info = {
+                    "type": "audio_chunk_info",
+                    "text": chunk.text,
+                    "chunk_id": chunk_id,
+                    "audio_size": len(chunk.audio),
+                    "timestamp": time.monotonic()
+                }
+                if chunk.is_final:
+                    audio_info["is_final"] = True
+                else:
+                    sentence_chunks += 1
                 
-                if len(cleaned_buffer) > processed_text_length:
-                    remaining_text = cleaned_buffer[processed_text_length:].strip()
+                if framing == AUDIO_FRAMING_ENVELOPE:
+                    # 元数据和音频合并为一个二进制帧
+                    audio_info["type"] = "audio_chunk"
+                    await outgoing.put(_pack_audio_envelope(audio_info, chunk.audio))
+                else:
+                    await outgoing.put(audio_info)
                     
-                    if remaining_text and len(remaining_text) >= 3:
-                        try:
-                            audio_buffer = await synthesize_speech_chunk(remaining_text)
-                            if audio_buffer:
-                                await websocket.send_json({
-                                    "type": "audio_chunk_info",
-                                    "text": remaining_text,
-                                    "chunk_id": chunk_counter,
-                                    "audio_size": len(audio_buffer),
-                                    "is_final": True,
-                                    "timestamp": asyncio.get_event_loop().time()
-                                })
-                                await websocket.send_bytes(audio_buffer)
-                                
-                        except Exception as e:
-                            logger.error(f"❌ 最终TTS合成失败: {e}")
+                    # 发送二进制音频数据
+                    await outgoing.put(chunk.audio)
+            
+            async def send_error(chunk: SpeechChunk):
+                await outgoing.put({
+                    "type": "tts_error",
+                    "message": f"语音合成失败: {str(chunk.error)}",
+                    "text": chunk.text[:100],
+                    "timestamp": time.monotonic()
+                })
+            
+            async with OrderedSpeechSynthesizer(max_parallel=settings.tts_max_parallel) as synthesizer:
+                producer = asyncio.create_task(produce_speech_sentences(
+                    lm_studio_service.chat_completion_stream(chat_request), synthesizer, send_text
+                ))
+                emitter = asyncio.create_task(emit_speech_chunks(synthesizer, send_audio, send_error))
+                emitter.add_done_callback(lambda _: outgoing.put_nowait(None))
+                
+                try:
+                    while (message := await outgoing.get()) is not None:
+                        if isinstance(message, bytes):
+                            await websocket.send_bytes(message)
+                        else:
+                            await websocket.send_text(orjson.dumps(message).decode())
+                    text_buffer, _ = await asyncio.gather(producer, emitter)
+                except WebSocketDisconnect:
+                    logger.info("🔌 客户端已断开，取消进行中的AI生成和语音合成")
+                    raise
+                finally:
+                    for task in (producer, emitter):
+                        task.cancel()
+                    await asyncio.gather(producer, emitter, return_exceptions=True)
             
             # 发送完成信号
             await websocket.send_json({
                 "type": "stream_complete",
                 "full_response": text_buffer.strip(),
-                "total_chunks": chunk_counter,
-                "timestamp": asyncio.get_event_loop().time()
+                "total_chunks": sentence_chunks,
+                "timestamp": time.monotonic()
             })
             
             # 恢复监听状态
@@ -284,15 +263,17 @@ class VoiceWebSocketService:
                 "type": "status",
                 "status": "listening",
                 "message": "等待下一次语音输入",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": time.monotonic()
             })
             
+        except WebSocketDisconnect:
+            raise
         except Exception as e:
             logger.error(f"❌ 流式AI响应处理失败: {e}")
             await websocket.send_json({
                 "type": "error",
                 "error": f"AI响应处理失败: {str(e)}",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": time.monotonic()
             })
 
 # 创建全局服务实例
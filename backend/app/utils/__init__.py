@@ -1,125 +1,172 @@
 """
 Utils 工具包
 统一导入所有工具类和函数
-"""
-
-# 通用工具
-from .common_utils import generate_doc_id, get_random_color, get_timestamp, safe_get, safe_int, safe_float, safe_str_convert, truncate_string, calculate_similarity
-
-# 文本处理
-from .text_processing import TextProcessor, clean_extracted_text
-
-# 文档分析
-from .document_analysis import DocumentAnalyzer
 
-# LLM客户端
-from .llm_client import LLMClient
-
-# 语音处理
-from .voice_utils import (
-    VoiceProcessor, 
-    clean_text_for_speech, 
-    split_text_for_tts, 
-    synthesize_speech_chunk,
-    convert_rate_to_string,
-    validate_audio_data,
-    format_voice_response
-)
+子模块在首次访问对应属性时才导入（PEP 562），
+只使用文本清理等轻量工具时不会加载 torch、OpenCV 等重量级依赖。
+"""
 
-# 时间处理
-from .time_utils import (
-    TimeUtils, 
-    now_china, 
-    now_china_naive, 
-    utc_to_china, 
-    china_to_utc, 
-    format_china_time, 
-    get_china_timestamp_sql
-)
+import importlib
+from typing import Dict, Tuple
 
-# 图像处理
-from .image_processing import (
-    ImageProcessor,
-    enhance_image,
-    preprocess_for_ocr,
-    adjust_brightness_contrast,
-    resize_for_processing
-)
+# 各子模块导出的名称
+_SUBMODULE_EXPORTS: Dict[str, Tuple[str, ...]] = {
+    # 通用工具
+    "common_utils": (
+        "generate_doc_id", "get_random_color", "get_timestamp", "safe_get", "safe_int",
+        "safe_float", "safe_str_convert", "truncate_string", "calculate_similarity",
+    ),
+    
+    # 文本处理
+    "text_processing": ("TextProcessor", "clean_extracted_text"),
+    
+    # 文档分析
+    "document_analysis": ("DocumentAnalyzer",),
+    
+    # LLM客户端
+    "llm_client": ("LLMClient",),
+    
+    # 语音处理
+    "voice_utils": (
+        "VoiceProcessor",
+        "IncrementalSpeechCleaner",
+        "OrderedSpeechSynthesizer",
+        "SpeechChunk",
+        "clean_text_for_speech",
+        "split_text_for_tts",
+        "find_split_index",
+        "produce_speech_sentences",
+        "emit_speech_chunks",
+        "VOICE_CHAT_REQUEST_DEFAULTS",
+        "synthesize_speech_chunk",
+        "convert_rate_to_string",
+        "format_voice_response",
+        "VOICE_POOL",
+    ),
+    
+    # 时间处理
+    "time_utils": (
+        "TimeUtils",
+        "now_china",
+        "now_china_naive",
+        "utc_to_china",
+        "china_to_utc",
+        "format_china_time",
+        "get_china_timestamp_sql",
+    ),
+    
+    # 图像处理
+    "image_processing": (
+        "ImageProcessor",
+        "enhance_image",
+        "preprocess_for_ocr",
+        "adjust_brightness_contrast",
+        "resize_for_processing",
+    ),
+    
+    # 缓存工具
+    "cache_utils": (
+        "FileHashCache",
+        "ContentHashCache",
+        "OCRCache",
+        "FileExtractionCache",
+        "create_file_cache",
+        "create_content_cache",
+        "create_ocr_cache",
+        "create_file_extraction_cache",
+    ),
+    
+    # 文件处理工具
+    "file_utils": (
+        "FileTypeDetector",
+        "detect_file_type",
+        "detect_file_type_header",
+        "get_supported_file_types",
+        "is_supported_file_type",
+        "get_file_category",
+        "get_file_info",
+        "validate_file_size",
+    ),
+    
+    # 音频处理（validate_audio_data 使用此模块的实现）
+    "audio_utils": (
+        "AudioProcessor",
+        "preprocess_audio",
+        "save_audio_temp",
+        "validate_audio_data",
+        "cleanup_temp_file",
+        "flush_temp_file_cleanup",
+    ),
+    
+    # 设备管理
+    "device_utils": (
+        "DeviceManager",
+        "get_optimal_device",
+        "get_cache_dir",
+        "get_model_device_config",
+        "setup_mps_optimization",
+        "setup_device_optimization",
+        "warmup_model",
+        "get_memory_usage",
+        "clear_device_cache",
+        "get_device_info",
+    ),
+    
+    # 情感分析
+    "emotion_utils": (
+        "EmotionAnalyzer",
+        "analyze_emotion",
+        "extract_emotion_info",
+        "extract_emotion_info_batch",
+        "extract_event_info",
+        "clean_text",
+        "generate_simple_response",
+        # SenseVoice 专用函数
+        "extract_sensevoice_emotion_info",
+        "extract_sensevoice_event_info",
+        "clean_sensevoice_text",
+        "extract_sensevoice_all",
+        "emotion_cache_clear",
+    ),
+    
+    # LLM工具
+    "llm_utils": (
+        "MessageProcessor",
+        "prepare_messages",
+        "format_chat_history",
+        "create_conversation_context",
+        "extract_response_content",
+        "validate_message_format",
+        "truncate_messages",
+        # 新增便捷函数
+        "prepare_lm_studio_messages",
+        "format_user_message",
+        "format_assistant_message",
+        "limit_conversation_history",
+    ),
+}
 
-# 缓存工具
-from .cache_utils import (
-    FileHashCache,
-    ContentHashCache,
-    OCRCache,
-    FileExtractionCache,
-    create_file_cache,
-    create_content_cache,
-    create_ocr_cache,
-    create_file_extraction_cache
-)
+# 名称 -> 所在子模块
+_LAZY_IMPORTS: Dict[str, str] = {
+    name: module
+    for module, names in _SUBMODULE_EXPORTS.items()
+    for name in names
+}
 
-# 文件处理工具
-from .file_utils import (
-    FileTypeDetector,
-    detect_file_type,
-    get_supported_file_types,
-    is_supported_file_type,
-    get_file_category,
-    get_file_info,
-    validate_file_size
-)
 
-# 音频处理
-from .audio_utils import (
-    AudioProcessor,
-    preprocess_audio,
-    save_audio_temp,
-    validate_audio_data,
-    cleanup_temp_file
-)
+def __getattr__(name: str):
+    """首次访问时导入对应子模块，并缓存到包命名空间"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
 
-# 设备管理
-from .device_utils import (
-    DeviceManager,
-    get_optimal_device,
-    get_cache_dir,
-    get_model_device_config,
-    setup_mps_optimization,
-    setup_device_optimization,
-    get_memory_usage,
-    clear_device_cache,
-    get_device_info
-)
 
-# 情感分析
-from .emotion_utils import (
-    EmotionAnalyzer,
-    analyze_emotion,
-    extract_emotion_info,
-    extract_event_info,
-    clean_text,
-    generate_simple_response,
-    # SenseVoice 专用函数
-    extract_sensevoice_emotion_info,
-    extract_sensevoice_event_info,
-    clean_sensevoice_text
-)
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
-# LLM工具
-from .llm_utils import (
-    MessageProcessor,
-    prepare_messages,
-    format_chat_history,
-    create_conversation_context,
-    extract_response_content,
-    validate_message_format,
-    truncate_messages,
-    # 新增便捷函数
-    prepare_lm_studio_messages,
-    format_user_message,
-    format_assistant_message,
-    limit_conversation_history
-)
 
 __all__ = [
     # 通用工具
@@ -144,9 +191,17 @@ __all__ = [
     
     # 语音处理
     'VoiceProcessor',
+    'IncrementalSpeechCleaner',
+    'OrderedSpeechSynthesizer',
+    'SpeechChunk',
     'clean_text_for_speech',
     'split_text_for_tts',
+    'find_split_index',
+    'produce_speech_sentences',
+    'emit_speech_chunks',
+    'VOICE_CHAT_REQUEST_DEFAULTS',
     'synthesize_speech_chunk',
+    'VOICE_POOL',
     
     # 时间处理
     'TimeUtils',
@@ -177,6 +232,7 @@ __all__ = [
     # 文件处理工具
     'FileTypeDetector',
     'detect_file_type',
+    'detect_file_type_header',
     'get_supported_file_types',
     'is_supported_file_type',
     'get_file_category',
@@ -192,6 +248,7 @@ __all__ = [
     'save_audio_temp',
     'validate_audio_data',
     'cleanup_temp_file',
+    'flush_temp_file_cleanup',
     
     # 设备管理
     'DeviceManager',
@@ -200,6 +257,7 @@ __all__ = [
     'get_model_device_config',
     'setup_mps_optimization',
     'setup_device_optimization',
+    'warmup_model',
     'get_memory_usage',
     'clear_device_cache',
     'get_device_info',
@@ -208,6 +266,7 @@ __all__ = [
     'EmotionAnalyzer',
     'analyze_emotion',
     'extract_emotion_info',
+    'extract_emotion_info_batch',
     'extract_event_info',
     'clean_text',
     'generate_simple_response',
@@ -215,6 +274,8 @@ __all__ = [
     'extract_sensevoice_emotion_info',
     'extract_sensevoice_event_info',
     'clean_sensevoice_text',
+    'extract_sensevoice_all',
+    'emotion_cache_clear',
     
     # LLM工具
     'MessageProcessor',
@@ -229,4 +290,4 @@ __all__ = [
     'format_user_message',
     'format_assistant_message',
     'limit_conversation_history',
-] 
\ No newline at end of file
+] 
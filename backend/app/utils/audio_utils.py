@@ -4,15 +4,162 @@
 """
 
 import os
+import queue
+import asyncio
+import threading
 import tempfile
 import logging
-from typing import Dict, Any, Optional
+from math import gcd
+from typing import Dict, Any, List
 from io import BytesIO
 import soundfile as sf
 from pydub import AudioSegment
+from .voice_utils import VOICE_POOL
+
+# scipy 可选依赖，用于进程内重采样
+try:
+    from scipy.signal import resample_poly
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# 音频格式魔数：前4字节
+_AUDIO_MAGIC_4 = {
+    b'RIFF': "wav",
+    b'OggS': "ogg",
+}
+# MP3帧同步头（MPEG-1/MPEG-2 Layer III，含/不含CRC）
+_MP3_HEADERS = frozenset((b'\xff\xfb', b'\xff\xf3', b'\xff\xfa', b'\xff\xf2'))
+
+# 可由libsndfile在进程内直接解码的格式，其余格式（webm/opus等）交给pydub/ffmpeg
+_SNDFILE_MAGIC = (b'RIFF', b'OggS', b'fLaC')
+
+# 模型所需的音频参数
+TARGET_SAMPLE_RATE = 16000
+MIN_AUDIO_DURATION_MS = 100
+
+
+class TempFilePool:
+    """
+    临时音频文件池
+    
+    预处理输出的WAV文件从池中取用，用完后截断并归还，而不是每次新建和删除，
+    减少inode创建/删除开销。存在 /dev/shm 时文件放在内存文件系统中，
+    不产生磁盘IO。池已用尽时退回普通临时文件，由清理流程直接删除。
+    """
+    
+    def __init__(self, size: int = 8, suffix: str = '.wav'):
+        self.size = size
+        self.suffix = suffix
+        self.directory = '/dev/shm' if os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+        self._free: "queue.Queue[str]" = queue.Queue()
+        self._owned: set = set()
+        # 已取出、尚未归还的池内文件，用于保证同一路径只归还一次
+        self._in_use: set = set()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> str:
+        """取得一个空的临时文件路径"""
+        try:
+            path = self._free.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            with self._lock:
+                self._in_use.add(path)
+            return path
+        
+        with self._lock:
+            pooled = len(self._owned) < self.size
+            prefix = 'audio_pool_' if pooled else 'audio_'
+            fd, path = tempfile.mkstemp(suffix=self.suffix, prefix=prefix, dir=self.directory)
+            os.close(fd)
+            if pooled:
+                self._owned.add(path)
+                self._in_use.add(path)
+        return path
+    
+    def owns(self, path: str) -> bool:
+        """判断路径是否属于文件池"""
+        return path in self._owned
+    
+    def release(self, path: str):
+        """截断文件并归还到池中；不属于文件池的路径直接删除。重复归还同一路径时忽略"""
+        if not self.owns(path):
+            os.unlink(path)
+            return
+        with self._lock:
+            if path not in self._in_use:
+                return
+            self._in_use.discard(path)
+        try:
+            os.truncate(path, 0)
+        except FileNotFoundError:
+            # 文件被外部删除，从池中移除
+            with self._lock:
+                self._owned.discard(path)
+            return
+        self._free.put_nowait(path)
+    
+    def close(self):
+        """删除文件池中的所有文件"""
+        with self._lock:
+            owned, self._owned = self._owned, set()
+            self._in_use = set()
+            self._free = queue.Queue()
+        for path in owned:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+# 预处理输出文件池
+TEMP_FILE_POOL = TempFilePool(size=int(os.getenv("AUDIO_TEMP_POOL", "8")))
+
+
+def _unlink_paths(paths: List[str]) -> int:
+    """同步删除一批临时文件（文件池中的文件归还到池中），返回成功清理的数量"""
+    removed = 0
+    for path in paths:
+        try:
+            TEMP_FILE_POOL.release(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"❌ 临时文件清理失败: {path}, {e}")
+    return removed
+
+
+async def flush_temp_file_cleanup():
+    """删除文件池中的所有临时文件（应用关闭时调用）"""
+    TEMP_FILE_POOL.close()
+
+
+def _convert_with_soundfile(audio_data: bytes, output_path: str) -> None:
+    """
+    使用libsndfile在进程内解码，并转换为16kHz单声道WAV
+    
+    不需要启动ffmpeg子进程，也不需要写入输入临时文件。
+    """
+    data, sample_rate = sf.read(BytesIO(audio_data), dtype='float32', always_2d=True)
+    
+    duration_ms = len(data) * 1000 / sample_rate
+    logger.info(f"🎵 音频信息: 时长={duration_ms:.0f}ms, 采样率={sample_rate}Hz, 声道={data.shape[1]}")
+    if duration_ms < MIN_AUDIO_DURATION_MS:
+        raise ValueError(f"音频时长太短: {duration_ms:.0f}ms")
+    
+    # 下混为单声道并重采样
+    mono = data.mean(axis=1)
+    if sample_rate != TARGET_SAMPLE_RATE:
+        divisor = gcd(sample_rate, TARGET_SAMPLE_RATE)
+        mono = resample_poly(mono, TARGET_SAMPLE_RATE // divisor, sample_rate // divisor).clip(-1.0, 1.0)
+    
+    sf.write(output_path, mono, TARGET_SAMPLE_RATE, subtype='PCM_16')
+
 class AudioProcessor:
     """音频处理工具类"""
     
@@ -21,6 +168,8 @@ class AudioProcessor:
         """
         预处理音频数据，转换为模型所需格式
         
+        解码、重采样和文件读写都是阻塞操作，在语音线程池中执行，不阻塞事件循环。
+        
         Args:
             audio_data: 音频数据（字节）
             
@@ -30,6 +179,25 @@ class AudioProcessor:
         Raises:
             ValueError: 音频数据无效时抛出异常
         """
+        return await asyncio.get_running_loop().run_in_executor(
+            VOICE_POOL, AudioProcessor._preprocess_audio_sync, audio_data
+        )
+    
+    @staticmethod
+    def _preprocess_audio_sync(audio_data: bytes) -> str:
+        """
+        预处理音频数据（同步实现）
+        
+        Args:
+            audio_data: 音频数据（字节）
+            
+        Returns:
+            str: 处理后的音频文件路径
+            
+        Raises:
+            ValueError: 音频数据无效时抛出异常
+        """
+        output_path = None
         try:
             # 验证音频数据
             if not audio_data or len(audio_data) < 100:  # 至少100字节
@@ -37,60 +205,51 @@ class AudioProcessor:
             
             logger.info(f"🎵 开始音频预处理，数据大小: {len(audio_data)} bytes")
             
-            # 创建临时文件
-            temp_input = tempfile.NamedTemporaryFile(delete=False, suffix='.webm')
-            temp_output = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+            # 输出临时文件（模型需要文件路径），从文件池中取用
+            output_path = TEMP_FILE_POOL.acquire()
             
+            # WAV/OGG/FLAC 优先在进程内解码和重采样
+            if SCIPY_AVAILABLE and audio_data[:4] in _SNDFILE_MAGIC:
+                try:
+                    _convert_with_soundfile(audio_data, output_path)
+                    logger.info(f"✅ 音频转换成功: {output_path} ({os.path.getsize(output_path)} bytes)")
+                    return output_path
+                except Exception as sndfile_error:
+                    logger.warning(f"⚠️ soundfile音频处理失败，改用pydub: {sndfile_error}")
+            
+            # 使用 pydub 转换音频格式，输入直接从内存读取，不写入临时文件
             try:
-                # 写入原始音频数据
-                temp_input.write(audio_data)
-                temp_input.close()
+                audio = AudioSegment.from_file(BytesIO(audio_data))
+                logger.info(f"🎵 音频信息: 时长={len(audio)}ms, 采样率={audio.frame_rate}Hz, 声道={audio.channels}")
                 
-                # 验证文件是否写入成功
-                if not os.path.exists(temp_input.name) or os.path.getsize(temp_input.name) == 0:
-                    raise ValueError("临时音频文件创建失败")
+                # 检查音频时长
+                if len(audio) < MIN_AUDIO_DURATION_MS:  # 至少100毫秒
+                    raise ValueError(f"音频时长太短: {len(audio)}ms")
                 
-                logger.info(f"📁 临时文件创建成功: {temp_input.name} ({os.path.getsize(temp_input.name)} bytes)")
+                # 转换为 16kHz 单声道 WAV
+                audio = audio.set_frame_rate(TARGET_SAMPLE_RATE).set_channels(1)
+                audio.export(output_path, format="wav")
                 
-                # 使用 pydub 转换音频格式
-                try:
-                    audio = AudioSegment.from_file(temp_input.name)
-                    logger.info(f"🎵 音频信息: 时长={len(audio)}ms, 采样率={audio.frame_rate}Hz, 声道={audio.channels}")
-                    
-                    # 检查音频时长
-                    if len(audio) < 100:  # 至少100毫秒
-                        raise ValueError(f"音频时长太短: {len(audio)}ms")
-                    
-                    # 转换为 16kHz 单声道 WAV
-                    audio = audio.set_frame_rate(16000).set_channels(1)
-                    audio.export(temp_output.name, format="wav")
-                    
-                    temp_output.close()
-                    
-                    # 验证输出文件
-                    if not os.path.exists(temp_output.name) or os.path.getsize(temp_output.name) == 0:
-                        raise ValueError("音频转换失败，输出文件为空")
-                    
-                    logger.info(f"✅ 音频转换成功: {temp_output.name} ({os.path.getsize(temp_output.name)} bytes)")
-                    
-                except Exception as audio_error:
-                    logger.error(f"❌ pydub音频处理失败: {audio_error}")
-                    # 尝试直接使用原始数据
-                    temp_output.close()
-                    with open(temp_output.name, 'wb') as f:
-                        f.write(audio_data)
-                    logger.info("🔄 使用原始音频数据作为备选方案")
+                # 验证输出文件
+                if os.path.getsize(output_path) == 0:
+                    raise ValueError("音频转换失败，输出文件为空")
                 
-            finally:
-                # 清理输入临时文件
-                if os.path.exists(temp_input.name):
-                    os.unlink(temp_input.name)
+                logger.info(f"✅ 音频转换成功: {output_path} ({os.path.getsize(output_path)} bytes)")
+                
+            except Exception as audio_error:
+                logger.error(f"❌ pydub音频处理失败: {audio_error}")
+                # 尝试直接使用原始数据
+                with open(output_path, 'wb') as f:
+                    f.write(audio_data)
+                logger.info("🔄 使用原始音频数据作为备选方案")
             
-            return temp_output.name
+            return output_path
             
         except Exception as e:
             logger.error(f"❌ 音频预处理失败: {e}")
-            # 如果预处理完全失败，返回错误而不是创建无效文件
+            # 如果预处理完全失败，归还输出文件并返回错误，而不是留下无效文件
+            if output_path is not None:
+                _unlink_paths([output_path])
             raise ValueError(f"音频预处理失败: {str(e)}")
     
     @staticmethod
@@ -109,11 +268,16 @@ class AudioProcessor:
             Exception: 保存失败时抛出异常
         """
         try:
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-            temp_file.write(audio_data)
-            temp_file.close()
-            logger.info(f"📁 临时音频文件保存成功: {temp_file.name}")
-            return temp_file.name
+            # 直接写入原始文件描述符，不经过Python缓冲层
+            fd, temp_path = tempfile.mkstemp(suffix=suffix)
+            try:
+                view = memoryview(audio_data)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            logger.info(f"📁 临时音频文件保存成功: {temp_path}")
+            return temp_path
         except Exception as e:
             logger.error(f"❌ 保存临时音频文件失败: {e}")
             raise
@@ -146,16 +310,12 @@ class AudioProcessor:
                     "size": size
                 }
             
-            # 尝试基本的音频格式检测
-            format_detected = "unknown"
-            if audio_data.startswith(b'RIFF'):
-                format_detected = "wav"
-            elif audio_data.startswith(b'\xff\xfb') or audio_data.startswith(b'\xff\xf3'):
+            # 尝试基本的音频格式检测：先查魔数表，都不匹配时才搜索webm标记
+            format_detected = _AUDIO_MAGIC_4.get(audio_data[:4])
+            if format_detected is None and audio_data[:2] in _MP3_HEADERS:
                 format_detected = "mp3"
-            elif audio_data.startswith(b'OggS'):
-                format_detected = "ogg"
-            elif b'webm' in audio_data[:100].lower():
-                format_detected = "webm"
+            if format_detected is None:
+                format_detected = "webm" if b'webm' in audio_data[:100].lower() else "unknown"
             
             return {
                 "valid": True,
@@ -176,21 +336,15 @@ class AudioProcessor:
         """
         清理临时音频文件
         
+        文件池中的文件截断后归还，其他文件直接删除。
+        
         Args:
             file_path: 文件路径
             
         Returns:
             bool: 清理是否成功
         """
-        try:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-                logger.info(f"🗑️ 临时文件清理成功: {file_path}")
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"❌ 临时文件清理失败: {e}")
-            return False
+        return _unlink_paths([file_path]) == 1
 
 # 便利函数
 async def preprocess_audio(audio_data: bytes) -> str:
@@ -5,14 +5,75 @@
 """
 
 import os
+import mmap
 import time
 import hashlib
 import logging
-from typing import Dict, Tuple, Optional, Any, Union
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional, Any, Union
 from app.config import settings
 
+# BLAKE3 可选依赖（SIMD并行哈希，比MD5快数倍），不可用时使用SHA-256（支持SHA-NI硬件加速）
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# xxhash 可选依赖（非加密的SIMD哈希，缓存键不需要加密强度），不可用时使用BLAKE2b
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# 内容缓存用于快速排除未命中的前缀长度
+_CONTENT_PREFIX_SIZE = 4096
+
+# 不小于该大小的文件通过mmap一次性哈希，更小的文件mmap建立开销占主导
+_HASH_MMAP_MIN_SIZE = 64 * 1024
+
+# 小文件哈希的读取缓冲区，每个线程分配一次后复用
+_HASH_CHUNK_SIZE = _HASH_MMAP_MIN_SIZE
+_hash_buffers = threading.local()
+
+
+def _get_hash_buffer() -> Tuple[bytearray, memoryview]:
+    """获取当前线程的哈希读取缓冲区"""
+    buffers = getattr(_hash_buffers, 'buffers', None)
+    if buffers is None:
+        buffer = bytearray(_HASH_CHUNK_SIZE)
+        buffers = _hash_buffers.buffers = (buffer, memoryview(buffer))
+    return buffers
+
+
+def _new_file_hasher():
+    """创建文件哈希对象"""
+    if BLAKE3_AVAILABLE:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.sha256()
+
+
+def _new_key_hasher():
+    """创建内存缓存键的哈希对象（128位）"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+class _CacheEntry:
+    """缓存条目：结果、写入时间和内容前缀指纹（仅内容缓存使用）"""
+    
+    __slots__ = ('value', 'timestamp', 'prefix')
+    
+    def __init__(self, value: Any, timestamp: float, prefix: Optional[int] = None):
+        self.value = value
+        self.timestamp = timestamp
+        self.prefix = prefix
+
 
 class FileHashCache:
     """基于文件哈希的缓存系统"""
@@ -25,10 +86,15 @@ class FileHashCache:
             ttl: 缓存生存时间（秒）
             max_size: 最大缓存条目数
         """
-        self.cache: Dict[str, Tuple[Any, float]] = {}
+        # 按最近使用顺序排列，超出 max_size 时淘汰最久未使用的条目
+        self.cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
         self.ttl = ttl
         self.max_size = max_size
         self.enabled = True
+        self._op_count = 0
+        self._lock = threading.Lock()
+        # 文件哈希记忆：(st_dev, st_ino) -> (st_mtime_ns, st_size, 哈希值)，文件未变化时跳过重新哈希
+        self._stat_hashes: Dict[Tuple[int, int], Tuple[int, int, str]] = {}
     
     def _get_file_hash(self, file_path: str) -> str:
         """
@@ -38,57 +104,64 @@ class FileHashCache:
             file_path: 文件路径
             
         Returns:
-            文件的MD5哈希值
+            文件的哈希值（BLAKE3，不可用时为SHA-256）
         """
         try:
-            if not os.path.exists(file_path):
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
                 return ""
+            
+            # 修改时间和大小都未变化时直接返回记忆的哈希值
+            file_id = (st.st_dev, st.st_ino)
+            known = self._stat_hashes.get(file_id)
+            if known is not None and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+                return known[2]
                 
             with open(file_path, 'rb') as f:
-                file_hash = hashlib.md5()
-                # 分块读取以节省内存
-                chunk_size = 8192
-                while chunk := f.read(chunk_size):
-                    file_hash.update(chunk)
-                return file_hash.hexdigest()
+                file_hash = _new_file_hasher()
+                
+                if os.fstat(f.fileno()).st_size >= _HASH_MMAP_MIN_SIZE:
+                    # 大文件映射到内存，由哈希库的C代码一次处理完整个文件
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                            mm.madvise(mmap.MADV_SEQUENTIAL)
+                        file_hash.update(mm)
+                else:
+                    # 小文件分块读取到线程复用的缓冲区，读取循环中不再分配内存
+                    buffer, view = _get_hash_buffer()
+                    while n := f.readinto(buffer):
+                        file_hash.update(view[:n])
+                digest = file_hash.hexdigest()
+            
+            # 同一文件重新写入时覆盖旧记录；记录数超出上限时丢弃最早的记录
+            with self._lock:
+                self._stat_hashes.pop(file_id, None)
+                self._stat_hashes[file_id] = (st.st_mtime_ns, st.st_size, digest)
+                if len(self._stat_hashes) > self.max_size * 4:
+                    del self._stat_hashes[next(iter(self._stat_hashes))]
+            return digest
                 
         except (OSError, IOError) as e:
             logger.warning(f"计算文件哈希失败 {file_path}: {e}")
             return ""
     
-    def _cleanup_expired(self):
+    def _cleanup_expired(self, current_time: Optional[float] = None):
         """清理过期的缓存条目"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self.cache.items()
-            if current_time - timestamp > self.ttl
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
+        if current_time is None:
+            current_time = time.time()
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self.cache.items()
+                if current_time - entry.timestamp > self.ttl
+            ]
+            
+            for key in expired_keys:
+                del self.cache[key]
             
         if expired_keys:
             logger.debug(f"清理了 {len(expired_keys)} 个过期缓存条目")
     
-    def _manage_size(self):
-        """管理缓存大小，移除最旧的条目"""
-        if len(self.cache) <= self.max_size:
-            return
-            
-        # 按时间戳排序，移除最旧的条目
-        sorted_items = sorted(
-            self.cache.items(), 
-            key=lambda x: x[1][1]  # 按时间戳排序
-        )
-        
-        # 保留最新的max_size个条目
-        items_to_keep = sorted_items[-self.max_size:]
-        self.cache = dict(items_to_keep)
-        
-        removed_count = len(sorted_items) - len(items_to_keep)
-        if removed_count > 0:
-            logger.debug(f"移除了 {removed_count} 个旧缓存条目以控制大小")
-    
     def get(self, file_path: str) -> Optional[Any]:
         """
         获取缓存结果
@@ -103,21 +176,27 @@ class FileHashCache:
             return None
             
         try:
-            # 清理过期条目
-            self._cleanup_expired()
+            now = time.time()
+            
+            # 命中时按条目时间戳判断过期；每32次访问才全量清理一次过期条目
+            self._op_count += 1
+            if self._op_count & 31 == 0:
+                self._cleanup_expired(now)
             
             file_hash = self._get_file_hash(file_path)
             if not file_hash:
                 return None
                 
-            if file_hash in self.cache:
-                result, timestamp = self.cache[file_hash]
-                if time.time() - timestamp < self.ttl:
-                    logger.debug(f"使用缓存结果: {file_path}")
-                    return result
-                else:
-                    # 过期，删除条目
-                    del self.cache[file_hash]
+            with self._lock:
+                entry = self.cache.get(file_hash)
+                if entry is not None:
+                    if now - entry.timestamp < self.ttl:
+                        self.cache.move_to_end(file_hash)
+                        logger.debug("使用缓存结果: %s", file_path)
+                        return entry.value
+                    else:
+                        # 过期，删除条目
+                        del self.cache[file_hash]
                     
             return None
             
@@ -141,20 +220,25 @@ class FileHashCache:
             if not file_hash:
                 return
                 
-            self.cache[file_hash] = (result, time.time())
-            
-            # 管理缓存大小
-            self._manage_size()
+            with self._lock:
+                self.cache[file_hash] = _CacheEntry(result, time.time())
+                self.cache.move_to_end(file_hash)
+                
+                # 管理缓存大小
+                if len(self.cache) > self.max_size:
+                    self.cache.popitem(last=False)
             
-            logger.debug(f"缓存结果已保存: {file_path}")
+            logger.debug("缓存结果已保存: %s", file_path)
             
         except Exception as e:
             logger.warning(f"设置缓存失败: {e}")
     
     def clear(self):
         """清空所有缓存"""
-        cache_count = len(self.cache)
-        self.cache.clear()
+        with self._lock:
+            cache_count = len(self.cache)
+            self.cache.clear()
+            self._stat_hashes.clear()
         logger.info(f"已清空 {cache_count} 个缓存条目")
     
     def enable(self):
@@ -175,10 +259,11 @@ class FileHashCache:
             缓存统计信息
         """
         current_time = time.time()
-        valid_count = sum(
-            1 for _, timestamp in self.cache.values()
-            if current_time - timestamp < self.ttl
-        )
+        with self._lock:
+            valid_count = sum(
+                1 for entry in self.cache.values()
+                if current_time - entry.timestamp < self.ttl
+            )
         
         return {
             'total_entries': len(self.cache),
@@ -201,10 +286,15 @@ class ContentHashCache:
             ttl: 缓存生存时间（秒）
             max_size: 最大缓存条目数
         """
-        self.cache: Dict[str, Tuple[Any, float]] = {}
+        # 按最近使用顺序排列，超出 max_size 时淘汰最久未使用的条目
+        self.cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
         self.ttl = ttl
         self.max_size = max_size
         self.enabled = True
+        self._op_count = 0
+        self._lock = threading.Lock()
+        # 已缓存内容的前缀指纹 -> 条目数，前缀不存在时无需计算完整内容哈希
+        self._prefix_counts: Dict[int, int] = {}
     
     def _get_content_hash(self, content: Union[str, bytes], *args) -> str:
         """
@@ -215,10 +305,10 @@ class ContentHashCache:
             *args: 额外的参数用于生成唯一哈希
             
         Returns:
-            内容的MD5哈希值
+            内容的哈希值（xxh3-128，不可用时为BLAKE2b-128）
         """
         try:
-            hasher = hashlib.md5()
+            hasher = _new_key_hasher()
             
             # 处理内容
             if isinstance(content, str):
@@ -243,38 +333,45 @@ class ContentHashCache:
             logger.warning(f"计算内容哈希失败: {e}")
             return ""
     
-    def _cleanup_expired(self):
+    @staticmethod
+    def _get_prefix_key(content: Union[str, bytes]) -> Optional[int]:
+        """内容前缀指纹，非字符串/字节内容返回None（不参与快速排除）"""
+        if isinstance(content, (str, bytes)):
+            return hash(content[:_CONTENT_PREFIX_SIZE])
+        return None
+    
+    def _release_prefix(self, entry: _CacheEntry):
+        """条目移除时减少前缀计数"""
+        if entry.prefix is None:
+            return
+        count = self._prefix_counts.get(entry.prefix, 0) - 1
+        if count > 0:
+            self._prefix_counts[entry.prefix] = count
+        else:
+            self._prefix_counts.pop(entry.prefix, None)
+    
+    def _remove(self, key: str):
+        """移除缓存条目"""
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self._release_prefix(entry)
+    
+    def _cleanup_expired(self, current_time: Optional[float] = None):
         """清理过期的缓存条目"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self.cache.items()
-            if current_time - timestamp > self.ttl
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
+        if current_time is None:
+            current_time = time.time()
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self.cache.items()
+                if current_time - entry.timestamp > self.ttl
+            ]
+            
+            for key in expired_keys:
+                self._remove(key)
             
         if expired_keys:
             logger.debug(f"清理了 {len(expired_keys)} 个过期缓存条目")
     
-    def _manage_size(self):
-        """管理缓存大小"""
-        if len(self.cache) <= self.max_size:
-            return
-            
-        # 按时间戳排序，移除最旧的条目
-        sorted_items = sorted(
-            self.cache.items(), 
-            key=lambda x: x[1][1]
-        )
-        
-        items_to_keep = sorted_items[-self.max_size:]
-        self.cache = dict(items_to_keep)
-        
-        removed_count = len(sorted_items) - len(items_to_keep)
-        if removed_count > 0:
-            logger.debug(f"移除了 {removed_count} 个旧缓存条目")
-    
     def get(self, content: Union[str, bytes], *args) -> Optional[Any]:
         """
         获取缓存结果
@@ -290,19 +387,31 @@ class ContentHashCache:
             return None
             
         try:
-            self._cleanup_expired()
+            now = time.time()
+            
+            # 命中时按条目时间戳判断过期；每32次访问才全量清理一次过期条目
+            self._op_count += 1
+            if self._op_count & 31 == 0:
+                self._cleanup_expired(now)
+            
+            # 前缀从未缓存过时一定未命中，跳过对完整内容的哈希
+            prefix = self._get_prefix_key(content)
+            if prefix is not None and prefix not in self._prefix_counts:
+                return None
             
             content_hash = self._get_content_hash(content, *args)
             if not content_hash:
                 return None
                 
-            if content_hash in self.cache:
-                result, timestamp = self.cache[content_hash]
-                if time.time() - timestamp < self.ttl:
-                    logger.debug(f"使用内容缓存结果")
-                    return result
-                else:
-                    del self.cache[content_hash]
+            with self._lock:
+                entry = self.cache.get(content_hash)
+                if entry is not None:
+                    if now - entry.timestamp < self.ttl:
+                        self.cache.move_to_end(content_hash)
+                        logger.debug("使用内容缓存结果")
+                        return entry.value
+                    else:
+                        self._remove(content_hash)
                     
             return None
             
@@ -327,27 +436,38 @@ class ContentHashCache:
             if not content_hash:
                 return
                 
-            self.cache[content_hash] = (result, time.time())
-            self._manage_size()
+            with self._lock:
+                self._remove(content_hash)
+                prefix = self._get_prefix_key(content)
+                self.cache[content_hash] = _CacheEntry(result, time.time(), prefix)
+                if prefix is not None:
+                    self._prefix_counts[prefix] = self._prefix_counts.get(prefix, 0) + 1
+                
+                if len(self.cache) > self.max_size:
+                    _, evicted = self.cache.popitem(last=False)
+                    self._release_prefix(evicted)
             
-            logger.debug(f"内容缓存已保存")
+            logger.debug("内容缓存已保存")
             
         except Exception as e:
             logger.warning(f"设置内容缓存失败: {e}")
     
     def clear(self):
         """清空所有缓存"""
-        cache_count = len(self.cache)
-        self.cache.clear()
+        with self._lock:
+            cache_count = len(self.cache)
+            self.cache.clear()
+            self._prefix_counts.clear()
         logger.info(f"已清空 {cache_count} 个内容缓存条目")
     
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         current_time = time.time()
-        valid_count = sum(
-            1 for _, timestamp in self.cache.values()
-            if current_time - timestamp < self.ttl
-        )
+        with self._lock:
+            valid_count = sum(
+                1 for entry in self.cache.values()
+                if current_time - entry.timestamp < self.ttl
+            )
         
         return {
             'total_entries': len(self.cache),
@@ -360,7 +480,13 @@ class ContentHashCache:
 
 
 class OCRCache(FileHashCache):
-    """OCR专用缓存类（继承自FileHashCache）"""
+    """
+    OCR专用缓存类（继承自FileHashCache）
+    
+    沿用文件哈希作为键，条目固定为100个，存放在预分配的环形缓冲区中：
+    键、结果、时间戳分别存放在并行列表里，按槽位轮转覆盖最旧的条目，
+    _slots 记录键所在的槽位，查找为一次字典访问。
+    """
     
     def __init__(self, ttl: int = 3600):
         """
@@ -373,6 +499,33 @@ class OCRCache(FileHashCache):
         
         # 根据设置决定是否启用缓存
         self.enabled = getattr(settings, 'ocr_cache_enabled', True)
+        
+        self._keys: List[Optional[str]] = [None] * self.max_size
+        self._values: List[Optional[Tuple[str, float, float]]] = [None] * self.max_size
+        self._timestamps: List[float] = [0.0] * self.max_size
+        self._slots: Dict[str, int] = {}
+        self._next_slot = 0
+    
+    def _free_slot(self, slot: int):
+        """释放槽位（调用方持有锁）"""
+        del self._slots[self._keys[slot]]
+        self._keys[slot] = None
+        self._values[slot] = None
+    
+    def _cleanup_expired(self, current_time: Optional[float] = None):
+        """清理过期的缓存条目"""
+        if current_time is None:
+            current_time = time.time()
+        with self._lock:
+            expired_slots = [
+                slot for slot in self._slots.values()
+                if current_time - self._timestamps[slot] > self.ttl
+            ]
+            for slot in expired_slots:
+                self._free_slot(slot)
+        
+        if expired_slots:
+            logger.debug(f"清理了 {len(expired_slots)} 个过期OCR缓存条目")
     
     def get(self, file_path: str) -> Optional[Tuple[str, float, float]]:
         """
@@ -384,7 +537,29 @@ class OCRCache(FileHashCache):
         Returns:
             (提取的文本, 置信度, 处理时间) 或 None
         """
-        return super().get(file_path)
+        if not self.enabled:
+            return None
+        
+        try:
+            file_hash = self._get_file_hash(file_path)
+            if not file_hash:
+                return None
+            
+            now = time.time()
+            with self._lock:
+                slot = self._slots.get(file_hash)
+                if slot is None:
+                    return None
+                if now - self._timestamps[slot] < self.ttl:
+                    logger.debug("使用缓存结果: %s", file_path)
+                    return self._values[slot]
+                # 过期，释放槽位
+                self._free_slot(slot)
+            return None
+            
+        except Exception as e:
+            logger.warning(f"获取缓存失败: {e}")
+            return None
     
     def set(self, file_path: str, result: Tuple[str, float, float]):
         """
@@ -394,7 +569,61 @@ class OCRCache(FileHashCache):
             file_path: 文件路径
             result: (提取的文本, 置信度, 处理时间)
         """
-        super().set(file_path, result)
+        if not self.enabled:
+            return
+        
+        try:
+            file_hash = self._get_file_hash(file_path)
+            if not file_hash:
+                return
+            
+            with self._lock:
+                slot = self._slots.get(file_hash)
+                if slot is None:
+                    # 轮转到下一个槽位，覆盖其中最旧的条目
+                    slot = self._next_slot
+                    self._next_slot = (slot + 1) % self.max_size
+                    if self._keys[slot] is not None:
+                        self._free_slot(slot)
+                    self._keys[slot] = file_hash
+                    self._slots[file_hash] = slot
+                self._values[slot] = result
+                self._timestamps[slot] = time.time()
+            
+            logger.debug("缓存结果已保存: %s", file_path)
+            
+        except Exception as e:
+            logger.warning(f"设置缓存失败: {e}")
+    
+    def clear(self):
+        """清空所有缓存"""
+        with self._lock:
+            cache_count = len(self._slots)
+            self._keys = [None] * self.max_size
+            self._values = [None] * self.max_size
+            self._slots.clear()
+            self._next_slot = 0
+            self._stat_hashes.clear()
+        logger.info(f"已清空 {cache_count} 个缓存条目")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        current_time = time.time()
+        with self._lock:
+            total_count = len(self._slots)
+            valid_count = sum(
+                1 for slot in self._slots.values()
+                if current_time - self._timestamps[slot] < self.ttl
+            )
+        
+        return {
+            'total_entries': total_count,
+            'valid_entries': valid_count,
+            'expired_entries': total_count - valid_count,
+            'ttl': self.ttl,
+            'max_size': self.max_size,
+            'enabled': self.enabled
+        }
 
 
 # 提供便利函数
@@ -426,6 +655,7 @@ class FileExtractionCache:
         self.cache: Dict[str, Tuple[str, float, Dict]] = {}  # {hash: (text, timestamp, metadata)}
         self.ttl = ttl
         self.enabled = True
+        self._lock = threading.Lock()
     
     def _get_content_hash(self, content: bytes, filename: str) -> str:
         """
@@ -436,10 +666,10 @@ class FileExtractionCache:
             filename: 文件名
             
         Returns:
-            内容的MD5哈希值
+            内容的哈希值（xxh3-128，不可用时为BLAKE2b-128）
         """
         try:
-            hasher = hashlib.md5()
+            hasher = _new_key_hasher()
             hasher.update(content)
             hasher.update(filename.encode('utf-8'))
             return hasher.hexdigest()
@@ -466,13 +696,15 @@ class FileExtractionCache:
             if not content_hash:
                 return None
                 
-            if content_hash in self.cache:
-                text, timestamp, metadata = self.cache[content_hash]
-                if time.time() - timestamp < self.ttl:
-                    logger.info(f"使用缓存的文件提取结果: {filename}")
-                    return text, metadata
-                else:
-                    del self.cache[content_hash]
+            with self._lock:
+                cached = self.cache.get(content_hash)
+                if cached is not None:
+                    text, timestamp, metadata = cached
+                    if time.time() - timestamp < self.ttl:
+                        logger.info("使用缓存的文件提取结果: %s", filename)
+                        return text, metadata
+                    else:
+                        del self.cache[content_hash]
                     
             return None
             
@@ -498,16 +730,18 @@ class FileExtractionCache:
             if not content_hash:
                 return
                 
-            self.cache[content_hash] = (text, time.time(), metadata)
-            logger.debug(f"文件提取结果已缓存: {filename}")
+            with self._lock:
+                self.cache[content_hash] = (text, time.time(), metadata)
+            logger.debug("文件提取结果已缓存: %s", filename)
             
         except Exception as e:
             logger.warning(f"设置文件提取缓存失败: {e}")
     
     def clear(self):
         """清空所有缓存"""
-        cache_count = len(self.cache)
-        self.cache.clear()
+        with self._lock:
+            cache_count = len(self.cache)
+            self.cache.clear()
         logger.info(f"已清空 {cache_count} 个文件提取缓存条目")
     
     def enable(self):
@@ -523,10 +757,11 @@ class FileExtractionCache:
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         current_time = time.time()
-        valid_entries = sum(
-            1 for _, timestamp, _ in self.cache.values()
-            if current_time - timestamp < self.ttl
-        )
+        with self._lock:
+            valid_entries = sum(
+                1 for _, timestamp, _ in self.cache.values()
+                if current_time - timestamp < self.ttl
+            )
         
         return {
             'cache_type': 'file_extraction_cache',
@@ -8,8 +8,24 @@ import time
 import logging
 from typing import List, Any, Dict
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# ASCII文本达到该长度时使用NumPy字符位图计算相似度，更短的文本集合运算更快
+_SIMILARITY_BITMASK_MIN_LENGTH = 256
+
+
+def _ascii_char_mask(text: str) -> "np.ndarray":
+    """ASCII文本的字符出现位图"""
+    mask = np.zeros(128, dtype=bool)
+    mask[np.frombuffer(text.lower().encode('ascii'), dtype=np.uint8)] = True
+    return mask
+
 
 def generate_doc_id(content: str, filename: str) -> str:
     """
@@ -23,10 +39,10 @@ def generate_doc_id(content: str, filename: str) -> str:
         文档唯一ID
     """
     # 使用内容和文件名的哈希作为文档ID
-    content_hash = hashlib.md5(
-        (content + filename).encode('utf-8')
-    ).hexdigest()
-    return f"doc_{content_hash[:16]}"
+    # 分两次送入哈希，避免拼接出完整内容的副本；UTF-8编码可直接拼接，结果与拼接后哈希一致
+    hasher = hashlib.md5(content.encode('utf-8'))
+    hasher.update(filename.encode('utf-8'))
+    return f"doc_{hasher.hexdigest()[:16]}"
 
 
 def get_random_color() -> str:
@@ -147,6 +163,14 @@ def calculate_similarity(text1: str, text2: str) -> float:
         if not text1 or not text2:
             return 0.0
         
+        # 长ASCII文本用字符位图计算，交集/并集由NumPy向量化完成
+        if (NUMPY_AVAILABLE and text1.isascii() and text2.isascii()
+                and len(text1) + len(text2) >= _SIMILARITY_BITMASK_MIN_LENGTH):
+            mask1 = _ascii_char_mask(text1)
+            mask2 = _ascii_char_mask(text2)
+            union = int(np.count_nonzero(mask1 | mask2))
+            return int(np.count_nonzero(mask1 & mask2)) / union if union > 0 else 0.0
+        
         # 简单的字符级相似度计算
         set1 = set(text1.lower())
         set2 = set(text2.lower())
@@ -5,383 +5,439 @@
 
 import os
 import torch
+import time
 import logging
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Optional, Callable, Sequence
 from pathlib import Path
 
+# psutil 可选依赖，用于获取物理核心数
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
-class DeviceManager:
-    """设备管理工具类"""
+# 后端可用性在进程内不会变化，导入时探测一次
+try:
+    _CUDA_AVAILABLE = torch.cuda.is_available()
+except Exception:
+    _CUDA_AVAILABLE = False
+try:
+    _MPS_AVAILABLE = bool(getattr(getattr(torch.backends, 'mps', None), 'is_available', lambda: False)())
+except Exception:
+    _MPS_AVAILABLE = False
+
+def _cpu_thread_count() -> int:
+    """
+    CPU推理线程数：优先使用 OMP_NUM_THREADS，否则使用物理核心数
+    
+    超线程的逻辑核心共享计算单元，线程数超过物理核心数反而会互相争抢。
+    """
+    env_threads = os.getenv("OMP_NUM_THREADS")
+    if env_threads and env_threads.isdigit() and int(env_threads) > 0:
+        return int(env_threads)
+    physical = psutil.cpu_count(logical=False) if PSUTIL_AVAILABLE else None
+    return physical or os.cpu_count() or 1
+
+@lru_cache(maxsize=1)
+def _detect_optimal_device() -> str:
+    """
+    探测最优计算设备（进程内只执行一次）
+    
+    设备可用性在进程生命周期内不会变化，结果缓存后不再重复探测驱动状态，
+    检测日志也只输出一次。
+    """
+    if _CUDA_AVAILABLE:
+        device = "cuda"
+        logger.info("🚀 检测到 CUDA，使用 GPU 加速")
+    elif _MPS_AVAILABLE:
+        device = "mps"
+        logger.info("🍎 检测到 Apple Silicon，使用 MPS 加速")
+    else:
+        device = "cpu"
+        logger.info("🔧 使用 CPU 模式")
+    
+    return device
+
+def get_optimal_device() -> str:
+    """
+    获取最优计算设备（结果已缓存）
     
-    @staticmethod
-    def get_optimal_device() -> str:
-        """
-        获取最优计算设备
+    Returns:
+        str: 设备类型 ("cuda", "mps", "cpu")
+    """
+    return _detect_optimal_device()
+
+# 已确保存在的缓存目录
+_ENSURED_CACHE_DIRS = set()
+
+def get_cache_dir(env_var: str, default_path: str) -> str:
+    """
+    获取缓存目录路径
+    
+    Args:
+        env_var: 环境变量名
+        default_path: 默认路径
         
-        Returns:
-            str: 设备类型 ("cuda", "mps", "cpu")
-        """
-        try:
-            if torch.cuda.is_available():
-                device = "cuda"
-                logger.info("🚀 检测到 CUDA，使用 GPU 加速")
-            elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-                device = "mps"
-                logger.info("🍎 检测到 Apple Silicon，使用 MPS 加速")
-            else:
-                device = "cpu"
-                logger.info("🔧 使用 CPU 模式")
-            
-            return device
-            
-        except Exception as e:
-            logger.error(f"❌ 设备检测失败: {e}")
-            return "cpu"
+    Returns:
+        str: 缓存目录路径
+    """
+    try:
+        cache_dir = os.getenv(env_var, default_path)
+        
+        # 确保目录存在（每个目录只创建一次，之后直接返回）
+        if cache_dir not in _ENSURED_CACHE_DIRS:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            _ENSURED_CACHE_DIRS.add(cache_dir)
+            logger.info("📁 缓存目录: %s", cache_dir)
+        return cache_dir
+        
+    except Exception as e:
+        logger.error(f"❌ 创建缓存目录失败: {e}")
+        # 回退到默认路径
+        Path(default_path).mkdir(parents=True, exist_ok=True)
+        _ENSURED_CACHE_DIRS.add(default_path)
+        return default_path
+
+def get_model_device_config(device: str, model_type: str = "default") -> Dict[str, Any]:
+    """
+    获取模型设备配置
     
-    @staticmethod
-    def get_cache_dir(env_var: str, default_path: str) -> str:
-        """
-        获取缓存目录路径
+    Args:
+        device: 设备类型 ("cuda", "mps", "cpu")
+        model_type: 模型类型 ("funasr", "whisper", "default")
         
-        Args:
-            env_var: 环境变量名
-            default_path: 默认路径
-            
-        Returns:
-            str: 缓存目录路径
-        """
+    Returns:
+        Dict[str, Any]: 设备配置信息
+    """
+    config = {
+        "device": device,
+        "fallback_reason": None,
+        "optimizations": []
+    }
+    
+    # 验证设备可用性
+    if device == "cuda":
+        if not _CUDA_AVAILABLE:
+            config["device"] = "cpu"
+            config["fallback_reason"] = "CUDA不可用，回退到CPU"
+        else:
+            config["optimizations"].append("CUDA加速")
+            
+    elif device == "mps":
+        if not _MPS_AVAILABLE:
+            config["device"] = "cpu"
+            config["fallback_reason"] = "MPS不可用，回退到CPU"
+        else:
+            config["optimizations"].append("Apple Silicon MPS加速")
+            
+    else:
+        config["optimizations"].append("CPU模式")
+    
+    # 根据模型类型进行特殊配置
+    if model_type == "funasr":
+        if config["device"] == "mps":
+            # FunASR在MPS上的特殊配置
+            config["optimizations"].append("FunASR MPS优化")
+        elif config["device"] == "cuda":
+            config["optimizations"].append("FunASR CUDA优化")
+            
+    elif model_type == "whisper":
+        if config["device"] == "mps":
+            # Whisper在MPS上可能需要特殊处理
+            config["optimizations"].append("Whisper MPS兼容")
+            
+    logger.info("🔧 模型设备配置: %s (%s)", config["device"], model_type)
+    
+    return config
+
+def setup_mps_optimization(mps_memory_fraction: Optional[float] = None) -> Dict[str, Any]:
+    """
+    设置 Apple Silicon MPS 优化
+    
+    Apple Silicon 的CPU和GPU共享统一内存，默认不限制MPS内存比例，由系统分配器决定；
+    只有显式传入 mps_memory_fraction 时才设置上限。
+    
+    Args:
+        mps_memory_fraction: MPS内存使用比例上限（0~1），为None时不限制
+        
+    Returns:
+        Dict[str, Any]: 优化配置结果
+    """
+    if not _MPS_AVAILABLE:
+        return {
+            "enabled": False,
+            "reason": "MPS 不可用",
+            "device": "cpu"
+        }
+    
+    # 启用 MPS 回退机制
+    os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
+    
+    optimizations = ["MPS回退机制"]
+    
+    # 设置内存使用比例（可选）
+    if mps_memory_fraction is not None:
         try:
-            cache_dir = os.getenv(env_var, default_path)
-            
-            # 确保目录存在
-            Path(cache_dir).mkdir(parents=True, exist_ok=True)
-            
-            logger.info(f"📁 缓存目录: {cache_dir}")
-            return cache_dir
-            
+            torch.mps.set_per_process_memory_fraction(mps_memory_fraction)
+            optimizations.append(f"内存使用比例限制({mps_memory_fraction:.0%})")
         except Exception as e:
-            logger.error(f"❌ 创建缓存目录失败: {e}")
-            # 回退到默认路径
-            Path(default_path).mkdir(parents=True, exist_ok=True)
-            return default_path
-    
-    @staticmethod
-    def get_model_device_config(device: str, model_type: str = "default") -> Dict[str, Any]:
-        """
-        获取模型设备配置
+            logger.warning(f"⚠️ 设置MPS内存比例失败: {e}")
+    
+    logger.info("✅ Apple Silicon MPS 优化已启用")
+    
+    return {
+        "enabled": True,
+        "device": "mps",
+        "optimizations": optimizations,
+        "memory_fraction": mps_memory_fraction
+    }
+
+def setup_device_optimization(device: str) -> Dict[str, Any]:
+    """
+    根据设备类型设置优化配置
+    
+    Args:
+        device: 设备类型
         
-        Args:
-            device: 设备类型 ("cuda", "mps", "cpu")
-            model_type: 模型类型 ("funasr", "whisper", "default")
-            
-        Returns:
-            Dict[str, Any]: 设备配置信息
-        """
+    Returns:
+        Dict[str, Any]: 优化配置结果
+    """
+    optimizations = []
+    
+    if device == "mps":
+        # Apple Silicon MPS 优化
+        mps_config = setup_mps_optimization()
+        optimizations.extend(mps_config.get("optimizations", []))
+        
+    elif device == "cuda":
+        # CUDA 优化
         try:
-            config = {
-                "device": device,
-                "fallback_reason": None,
-                "optimizations": []
-            }
-            
-            # 验证设备可用性
-            if device == "cuda":
-                if not torch.cuda.is_available():
-                    config["device"] = "cpu"
-                    config["fallback_reason"] = "CUDA不可用，回退到CPU"
-                else:
-                    config["optimizations"].append("CUDA加速")
-                    
-            elif device == "mps":
-                if not (hasattr(torch.backends, 'mps') and torch.backends.mps.is_available()):
-                    config["device"] = "cpu"
-                    config["fallback_reason"] = "MPS不可用，回退到CPU"
-                else:
-                    config["optimizations"].append("Apple Silicon MPS加速")
-                    
-            else:
-                config["optimizations"].append("CPU模式")
-            
-            # 根据模型类型进行特殊配置
-            if model_type == "funasr":
-                if config["device"] == "mps":
-                    # FunASR在MPS上的特殊配置
-                    config["optimizations"].append("FunASR MPS优化")
-                elif config["device"] == "cuda":
-                    config["optimizations"].append("FunASR CUDA优化")
-                    
-            elif model_type == "whisper":
-                if config["device"] == "mps":
-                    # Whisper在MPS上可能需要特殊处理
-                    config["optimizations"].append("Whisper MPS兼容")
-                    
-            logger.info(f"🔧 模型设备配置: {config['device']} ({model_type})")
-            
-            return config
-            
+            torch.backends.cudnn.benchmark = True
+            torch.backends.cudnn.deterministic = False
+            optimizations.append("CUDNN基准测试优化")
+            optimizations.append("CUDNN非确定性优化")
+            # Ampere及以上架构使用TF32张量核心执行矩阵乘和卷积
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            optimizations.append("TF32优化")
         except Exception as e:
-            logger.error(f"❌ 获取模型设备配置失败: {e}")
-            return {
-                "device": "cpu",
-                "fallback_reason": f"配置失败: {str(e)}",
-                "optimizations": ["CPU回退模式"]
-            }
-    
-    @staticmethod
-    def setup_mps_optimization() -> Dict[str, Any]:
-        """
-        设置 Apple Silicon MPS 优化
+            logger.warning(f"⚠️ CUDA优化设置失败: {e}")
         
-        Returns:
-            Dict[str, Any]: 优化配置结果
-        """
+        # 可扩展显存段：输入长度不固定时减少显存碎片，避免碎片导致的OOM和cudaMalloc停顿
+        # 分配器在首次分配时读取环境变量；用户已配置时以用户配置为准
+        alloc_conf = os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
         try:
-            if not (hasattr(torch.backends, 'mps') and torch.backends.mps.is_available()):
-                return {
-                    "enabled": False,
-                    "reason": "MPS 不可用",
-                    "device": "cpu"
-                }
-            
-            # 启用 MPS 回退机制
-            os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
-            
-            # 设置内存使用比例
-            try:
-                torch.mps.set_per_process_memory_fraction(0.8)
-            except Exception as e:
-                logger.warning(f"⚠️ 设置MPS内存比例失败: {e}")
-            
-            # 启用 TF32 优化（如果支持）
-            try:
-                torch.backends.mps.allow_tf32 = True
-            except Exception as e:
-                logger.warning(f"⚠️ 启用TF32优化失败: {e}")
-            
-            logger.info("✅ Apple Silicon MPS 优化已启用")
-            
-            return {
-                "enabled": True,
-                "device": "mps",
-                "optimizations": [
-                    "MPS回退机制",
-                    "内存使用比例限制(80%)",
-                    "TF32优化"
-                ],
-                "memory_fraction": 0.8
-            }
-            
+            torch.cuda.memory._set_allocator_settings(alloc_conf)
         except Exception as e:
-            logger.error(f"❌ MPS优化设置失败: {e}")
-            return {
-                "enabled": False,
-                "error": str(e),
-                "device": "cpu"
-            }
-    
-    @staticmethod
-    def setup_device_optimization(device: str) -> Dict[str, Any]:
-        """
-        根据设备类型设置优化配置
+            logger.debug("运行时设置CUDA分配器跳过: %s", e)
+        if "expandable_segments:True" in alloc_conf:
+            optimizations.append("expandable_segments")
         
-        Args:
-            device: 设备类型
-            
-        Returns:
-            Dict[str, Any]: 优化配置结果
-        """
+    elif device == "cpu":
+        # CPU 优化
         try:
-            optimizations = []
-            
-            if device == "mps":
-                # Apple Silicon MPS 优化
-                mps_config = DeviceManager.setup_mps_optimization()
-                optimizations.extend(mps_config.get("optimizations", []))
-                
-            elif device == "cuda":
-                # CUDA 优化
-                try:
-                    torch.backends.cudnn.benchmark = True
-                    torch.backends.cudnn.deterministic = False
-                    optimizations.append("CUDNN基准测试优化")
-                    optimizations.append("CUDNN非确定性优化")
-                except Exception as e:
-                    logger.warning(f"⚠️ CUDA优化设置失败: {e}")
-                
-            elif device == "cpu":
-                # CPU 优化
-                try:
-                    torch.set_num_threads(torch.get_num_threads())
-                    optimizations.append(f"CPU线程数: {torch.get_num_threads()}")
-                except Exception as e:
-                    logger.warning(f"⚠️ CPU优化设置失败: {e}")
-            
-            logger.info(f"✅ {device.upper()} 设备优化配置完成")
-            
-            return {
-                "device": device,
-                "optimizations": optimizations,
-                "success": True
-            }
-            
+            num_threads = _cpu_thread_count()
+            torch.set_num_threads(num_threads)
+            optimizations.append(f"CPU线程数: {num_threads}")
         except Exception as e:
-            logger.error(f"❌ 设备优化配置失败: {e}")
-            return {
-                "device": device,
-                "optimizations": [],
-                "success": False,
-                "error": str(e)
-            }
-    
-    @staticmethod
-    def get_memory_usage(device: str = None) -> str:
-        """
-        获取设备内存使用情况
+            logger.warning(f"⚠️ CPU优化设置失败: {e}")
         
-        Args:
-            device: 设备类型，如果为None则自动检测
-            
-        Returns:
-            str: 内存使用情况描述
-        """
+        # 单次推理内部并行即可，算子间并行线程只会争抢核心；
+        # 只能在首次并行计算前设置，之后调用会抛出异常
         try:
-            if device is None:
-                device = DeviceManager.get_optimal_device()
-            
-            if device == "mps":
-                try:
-                    allocated = torch.mps.current_allocated_memory() / 1024 / 1024  # MB
-                    return f"{allocated:.1f} MB (MPS)"
-                except Exception:
-                    return "MPS 内存信息不可用"
-                    
-            elif device == "cuda":
-                try:
-                    allocated = torch.cuda.memory_allocated() / 1024 / 1024  # MB
-                    cached = torch.cuda.memory_reserved() / 1024 / 1024  # MB
-                    return f"已分配: {allocated:.1f} MB, 已缓存: {cached:.1f} MB (CUDA)"
-                except Exception:
-                    return "CUDA 内存信息不可用"
-                    
-            else:
-                return "CPU 模式"
-                
+            torch.set_num_interop_threads(1)
+            optimizations.append("算子间线程数: 1")
         except Exception as e:
-            logger.error(f"❌ 获取内存使用情况失败: {e}")
-            return "内存信息不可用"
+            logger.debug("算子间线程数设置跳过: %s", e)
+        
+        # 启用 oneDNN(MKLDNN) 加速
+        if torch.backends.mkldnn.is_available():
+            torch.backends.mkldnn.enabled = True
+            optimizations.append("oneDNN加速")
+    
+    logger.info("✅ %s 设备优化配置完成", device.upper())
     
-    @staticmethod
-    def clear_device_cache(device: str = None) -> bool:
-        """
-        清理设备缓存
+    return {
+        "device": device,
+        "optimizations": optimizations,
+        "success": True
+    }
+
+def warmup_model(infer: Callable[[Any], Any], warmup_inputs: Sequence[Any]) -> int:
+    """
+    模型预热
+    
+    开启 cudnn.benchmark 后每种新的输入形状首次推理都要搜索算法，
+    模型加载后用典型输入各推理一次，把这部分开销提前到启动阶段。
+    这是阻塞操作，应在线程池中调用。
+    
+    Args:
+        infer: 推理函数，接收单个输入
+        warmup_inputs: 预热输入列表（覆盖常见输入形状）
         
-        Args:
-            device: 设备类型，如果为None则自动检测
-            
-        Returns:
-            bool: 清理是否成功
-        """
-        try:
-            if device is None:
-                device = DeviceManager.get_optimal_device()
-            
-            if device == "mps":
-                torch.mps.empty_cache()
-                logger.info("🧹 MPS 缓存已清理")
-                
-            elif device == "cuda":
-                torch.cuda.empty_cache()
-                logger.info("🧹 CUDA 缓存已清理")
-                
-            else:
-                logger.info("ℹ️ CPU 模式无需清理缓存")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ 清理设备缓存失败: {e}")
-            return False
+    Returns:
+        int: 成功预热的输入数量
+    """
+    warmed = 0
+    start_time = time.time()
+    with torch.inference_mode():
+        for sample in warmup_inputs:
+            try:
+                infer(sample)
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ 模型预热失败: {e}")
+    
+    logger.info("🔥 模型预热完成: %d/%d，耗时 %.2fs", warmed, len(warmup_inputs), time.time() - start_time)
+    return warmed
+
+def get_memory_usage(device: str = None) -> str:
+    """
+    获取设备内存使用情况
     
-    @staticmethod
-    def get_device_info(device: str = None) -> Dict[str, Any]:
-        """
-        获取设备详细信息
+    Args:
+        device: 设备类型，如果为None则自动检测
         
-        Args:
-            device: 设备类型，如果为None则自动检测
-            
-        Returns:
-            Dict[str, Any]: 设备信息
-        """
+    Returns:
+        str: 内存使用情况描述
+    """
+    if device is None:
+        device = get_optimal_device()
+    
+    if device == "mps":
         try:
-            if device is None:
-                device = DeviceManager.get_optimal_device()
-            
-            info = {
-                "device": device,
-                "torch_version": torch.__version__,
-                "memory_usage": DeviceManager.get_memory_usage(device)
-            }
+            allocated_mb = torch.mps.current_allocated_memory() >> 20
+            return f"{allocated_mb} MB (MPS)"
+        except Exception:
+            return "MPS 内存信息不可用"
             
-            if device == "cuda":
-                info.update({
-                    "cuda_available": torch.cuda.is_available(),
-                    "cuda_device_count": torch.cuda.device_count(),
-                    "cuda_device_name": torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
-                    "cudnn_version": torch.backends.cudnn.version() if torch.backends.cudnn.is_available() else None
-                })
-                
-            elif device == "mps":
-                info.update({
-                    "mps_available": torch.backends.mps.is_available() if hasattr(torch.backends, 'mps') else False,
-                    "acceleration": "Apple Silicon MPS"
-                })
-                
-            else:
-                info.update({
-                    "cpu_count": torch.get_num_threads(),
-                    "acceleration": "CPU"
-                })
+    elif device == "cuda":
+        try:
+            allocated_mb = torch.cuda.memory_allocated() >> 20
+            cached_mb = torch.cuda.memory_reserved() >> 20
+            return f"已分配: {allocated_mb} MB, 已缓存: {cached_mb} MB (CUDA)"
+        except Exception:
+            return "CUDA 内存信息不可用"
+            
+    else:
+        return "CPU 模式"
+
+def clear_device_cache(device: str = None, force_release: bool = False) -> bool:
+    """
+    清理设备缓存
+    
+    empty_cache 会同步设备，并把缓存分配器本可复用的显存块归还驱动，
+    在推理路径上调用只会降低性能。默认不做任何操作，由缓存分配器按需回收；
+    仅在进程退出或需要把显存让给其他进程时传入 force_release=True。
+    
+    Args:
+        device: 设备类型，如果为None则自动检测
+        force_release: 是否真正把缓存显存归还给驱动
+        
+    Returns:
+        bool: 清理是否成功
+    """
+    if device is None:
+        device = get_optimal_device()
+    
+    if not force_release:
+        logger.debug("缓存分配器将按需回收显存，跳过 empty_cache")
+        return True
+    
+    try:
+        if device == "mps":
+            torch.mps.empty_cache()
+            logger.info("🧹 MPS 缓存已清理")
             
-            return info
+        elif device == "cuda":
+            torch.cuda.empty_cache()
+            logger.info("🧹 CUDA 缓存已清理")
             
-        except Exception as e:
-            logger.error(f"❌ 获取设备信息失败: {e}")
-            return {
-                "device": "unknown",
-                "error": str(e)
-            }
-
-# 便利函数
-def get_optimal_device() -> str:
-    """获取最优设备便利函数"""
-    return DeviceManager.get_optimal_device()
+        else:
+            logger.info("ℹ️ CPU 模式无需清理缓存")
+        
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 清理设备缓存失败: {e}")
+        return False
 
-def get_cache_dir(env_var: str, default_path: str) -> str:
-    """获取缓存目录便利函数"""
-    return DeviceManager.get_cache_dir(env_var, default_path)
+@lru_cache(maxsize=1)
+def _query_cuda_info() -> Dict[str, Any]:
+    """查询CUDA设备信息（进程内不变，只在查询成功时缓存，失败时抛出异常）"""
+    return {
+        "cuda_available": _CUDA_AVAILABLE,
+        "cuda_device_count": torch.cuda.device_count(),
+        "cuda_device_name": torch.cuda.get_device_name(0) if _CUDA_AVAILABLE else None,
+        "cudnn_version": torch.backends.cudnn.version() if torch.backends.cudnn.is_available() else None
+    }
 
-def get_model_device_config(device: str, model_type: str = "default") -> Dict[str, Any]:
-    """获取模型设备配置便利函数"""
-    return DeviceManager.get_model_device_config(device, model_type)
+def _info_cuda() -> Dict[str, Any]:
+    """CUDA设备信息"""
+    try:
+        return dict(_query_cuda_info())
+    except Exception as e:
+        logger.error(f"❌ 获取设备信息失败: {e}")
+        return {"cuda_available": _CUDA_AVAILABLE, "error": str(e)}
 
-def setup_mps_optimization() -> Dict[str, Any]:
-    """设置MPS优化便利函数"""
-    return DeviceManager.setup_mps_optimization()
+def _info_mps() -> Dict[str, Any]:
+    """MPS设备信息"""
+    return {
+        "mps_available": _MPS_AVAILABLE,
+        "acceleration": "Apple Silicon MPS"
+    }
 
-def setup_device_optimization(device: str) -> Dict[str, Any]:
-    """设置设备优化便利函数"""
-    return DeviceManager.setup_device_optimization(device)
-
-def get_memory_usage(device: str = None) -> str:
-    """获取内存使用情况便利函数"""
-    return DeviceManager.get_memory_usage(device)
+def _info_cpu() -> Dict[str, Any]:
+    """CPU设备信息"""
+    return {
+        "cpu_count": torch.get_num_threads(),
+        "acceleration": "CPU"
+    }
 
-def clear_device_cache(device: str = None) -> bool:
-    """清理设备缓存便利函数"""
-    return DeviceManager.clear_device_cache(device)
+# 各设备类型的信息生成函数，未知设备按CPU处理
+_DEVICE_INFO_PRODUCERS = {
+    "cuda": _info_cuda,
+    "mps": _info_mps,
+    "cpu": _info_cpu,
+}
 
 def get_device_info(device: str = None) -> Dict[str, Any]:
-    """获取设备信息便利函数"""
-    return DeviceManager.get_device_info(device) 
\ No newline at end of file
+    """
+    获取设备详细信息
+    
+    Args:
+        device: 设备类型，如果为None则自动检测
+        
+    Returns:
+        Dict[str, Any]: 设备信息
+    """
+    if device is None:
+        device = get_optimal_device()
+    
+    info = {
+        "device": device,
+        "torch_version": torch.__version__,
+        "memory_usage": get_memory_usage(device)
+    }
+    info.update(_DEVICE_INFO_PRODUCERS.get(device, _info_cpu)())
+    return info
+
+class DeviceManager:
+    """
+    设备管理工具类
+    
+    实现均为模块级函数，这里只保留类接口以兼容现有调用。
+    """
+    get_optimal_device = staticmethod(get_optimal_device)
+    get_cache_dir = staticmethod(get_cache_dir)
+    get_model_device_config = staticmethod(get_model_device_config)
+    setup_mps_optimization = staticmethod(setup_mps_optimization)
+    setup_device_optimization = staticmethod(setup_device_optimization)
+    warmup_model = staticmethod(warmup_model)
+    get_memory_usage = staticmethod(get_memory_usage)
+    clear_device_cache = staticmethod(clear_device_cache)
+    get_device_info = staticmethod(get_device_info)
@@ -2,13 +2,167 @@
 文档分析工具类
 """
 
-import json
 import re
 import logging
-from typing import Dict, Any
+import orjson
+from typing import Dict, Any, Optional
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# 预设知识库名称
+_PRESET_KNOWLEDGE_BASES = (
+    "个人简历", "合同文档", "教育培训", "技术文档",
+    "商务文档", "操作手册", "医疗健康", "政策法规"
+)
+_PRESET_SET = frozenset(_PRESET_KNOWLEDGE_BASES)
+# 预设名称及其分词，用于相似名称修正
+_PRESET_WORDS = tuple((preset, tuple(preset.split())) for preset in _PRESET_KNOWLEDGE_BASES)
+
+
+def _build_preset_automaton():
+    """构建预设知识库名称的Aho-Corasick自动机，单次扫描即可匹配全部预设"""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for preset in _PRESET_KNOWLEDGE_BASES:
+        automaton.add_word(preset, preset)
+    automaton.make_automaton()
+    return automaton
+
+
+_KB_AUTOMATON = _build_preset_automaton()
+
+# 分析结果必要字段的默认值
+_ANALYSIS_DEFAULTS = {
+    "knowledge_base_name": "通用文档",
+    "is_new_knowledge_base": False,
+    "document_type": "未知",
+    "reason": "AI智能分析结果"
+}
+
+# 各类回退结果模板，返回时复制一份
+_REGEX_FALLBACK_RESULT = {
+    "knowledge_base_name": "通用文档",
+    "is_new_knowledge_base": False,
+    "document_type": "未知",
+    "reason": "AI分析结果",
+    "confidence": 0.5
+}
+_PARSE_FAILED_RESULT = {
+    "knowledge_base_name": "通用文档",
+    "is_new_knowledge_base": False,
+    "document_type": "未知",
+    "reason": "解析失败，使用默认分类",
+    "confidence": 0.3
+}
+_VALIDATE_FAILED_RESULT = {
+    "knowledge_base_name": "通用文档",
+    "is_new_knowledge_base": False,
+    "document_type": "未知",
+    "reason": "验证失败，使用默认分类",
+    "confidence": 0.2
+}
+
+# LLM响应解析用的正则表达式
+# JSON扫描记号：字符串整体作为一个记号跳过（其中的括号不计入层级），其余只关心花括号
+_JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}]')
+_KB_NAME_RE = re.compile(r'knowledge_base_name["\s]*:["\s]*([^"]*)')
+_IS_NEW_RE = re.compile(r'is_new_knowledge_base["\s]*:["\s]*(true|false)', re.IGNORECASE)
+_DOC_TYPE_RE = re.compile(r'document_type["\s]*:["\s]*([^"]*)')
+_REASON_RE = re.compile(r'reason["\s]*:["\s]*([^"]*)')
+
+
+
+def _extract_json_object(text: str, start: int) -> Optional[str]:
+    """
+    从 start 处的 { 开始按括号层级扫描，返回配对完整的JSON对象文本
+    
+    扫描由正则在C层完成，单次遍历；字符串中的括号和转义引号不会干扰配对。
+    """
+    depth = 0
+    for token in _JSON_TOKEN_RE.finditer(text, start):
+        char = token.group()
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:token.end()]
+    return None
+
+
+def _parse_json_object(response: str) -> Optional[Dict]:
+    """从LLM响应中解析JSON对象，解析不到时返回None"""
+    # 截取第一个 { 到最后一个 } 之间的部分直接解析
+    # （整体就是JSON对象时即为全文；也能处理 ```json 代码块包裹的响应）
+    stripped = response.strip()
+    start = stripped.find('{')
+    end = stripped.rfind('}')
+    if -1 < start < end:
+        try:
+            return orjson.loads(stripped[start:end + 1])
+        except orjson.JSONDecodeError:
+            pass
+    
+    # 仍然失败时（如JSON前后还有其他花括号），依次尝试每个配对完整的JSON对象
+    while start != -1:
+        candidate = _extract_json_object(stripped, start)
+        if candidate is None:
+            break
+        try:
+            return orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            start = stripped.find('{', start + 1)
+    return None
+
+
+def _regex_fallback(response: str) -> Dict:
+    """JSON解析全部失败时，按字段从文本中提取分析结果"""
+    result = _REGEX_FALLBACK_RESULT.copy()
+    if (match := _KB_NAME_RE.search(response)):
+        result["knowledge_base_name"] = match.group(1)
+    if (match := _IS_NEW_RE.search(response)):
+        result["is_new_knowledge_base"] = match.group(1).lower() == 'true'
+    if (match := _DOC_TYPE_RE.search(response)):
+        result["document_type"] = match.group(1)
+    if (match := _REASON_RE.search(response)):
+        result["reason"] = match.group(1)
+    return result
+
+
+def _correct_knowledge_base(result: Dict) -> Dict:
+    """检查知识库名称，不在预设列表中时尝试修正为相近的预设名称（原地修改）"""
+    # 检查知识库名称是否在预设列表中
+    kb_name = result["knowledge_base_name"]
+    if kb_name not in _PRESET_SET:
+        # 如果不在预设列表中，标记为新知识库
+        result["is_new_knowledge_base"] = True
+        
+        # 优先用自动机在知识库名称中查找预设名称
+        if _KB_AUTOMATON is not None:
+            for _, preset in _KB_AUTOMATON.iter(kb_name):
+                result["knowledge_base_name"] = preset
+                result["is_new_knowledge_base"] = False
+                result["reason"] += f"（已修正为预设知识库：{preset}）"
+                return result
+        
+        # 但如果名称很相似，修正为预设名称
+        kb_words = kb_name.split()
+        for preset, preset_words in _PRESET_WORDS:
+            if any(word in kb_name for word in preset_words) or any(word in preset for word in kb_words):
+                result["knowledge_base_name"] = preset
+                result["is_new_knowledge_base"] = False
+                result["reason"] += f"（已修正为预设知识库：{preset}）"
+                break
+    
+    return result
+
 
 class DocumentAnalyzer:
     """文档分析工具类"""
@@ -25,40 +179,16 @@ class DocumentAnalyzer:
             解析后的结果字典
         """
         try:
-            # 尝试直接解析JSON
-            try:
-                return json.loads(response)
-            except json.JSONDecodeError:
-                pass
-            
-            # 如果直接解析失败，尝试提取JSON部分
-            json_match = re.search(r'\{[^{}]*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            parsed = _parse_json_object(response)
+            if parsed is not None:
+                return parsed
             
             # 如果仍然失败，从文本中提取信息
-            knowledge_base_match = re.search(r'knowledge_base_name["\s]*:["\s]*([^"]*)', response)
-            is_new_match = re.search(r'is_new_knowledge_base["\s]*:["\s]*(true|false)', response)
-            doc_type_match = re.search(r'document_type["\s]*:["\s]*([^"]*)', response)
-            reason_match = re.search(r'reason["\s]*:["\s]*([^"]*)', response)
-            
-            return {
-                "knowledge_base_name": knowledge_base_match.group(1) if knowledge_base_match else "通用文档",
-                "is_new_knowledge_base": is_new_match.group(1).lower() == 'true' if is_new_match else False,
-                "document_type": doc_type_match.group(1) if doc_type_match else "未知",
-                "reason": reason_match.group(1) if reason_match else "AI分析结果",
-                "confidence": 0.5
-            }
+            return _regex_fallback(response)
             
         except Exception as e:
             logger.warning(f"解析LLM响应失败: {e}")
-            return {
-                "knowledge_base_name": "通用文档",
-                "is_new_knowledge_base": False,
-                "document_type": "未知",
-                "reason": "解析失败，使用默认分类",
-                "confidence": 0.3
-            }
+            return _PARSE_FAILED_RESULT.copy()
 
     @staticmethod
     def validate_analysis_result(result: Dict, filename: str) -> Dict:
@@ -73,49 +203,42 @@ class DocumentAnalyzer:
             验证后的结果
         """
         try:
-            # 确保必要字段存在
-            if "knowledge_base_name" not in result:
-                result["knowledge_base_name"] = "通用文档"
-            
-            if "is_new_knowledge_base" not in result:
-                result["is_new_knowledge_base"] = False
-            
-            if "document_type" not in result:
-                result["document_type"] = "未知"
-            
-            if "reason" not in result:
-                result["reason"] = "AI智能分析结果"
+            # 确保必要字段存在：缺失的字段使用默认值
+            result = {**_ANALYSIS_DEFAULTS, **result}
             
-            # 检查知识库名称是否在预设列表中
-            preset_knowledge_bases = {
-                "个人简历", "合同文档", "教育培训", "技术文档", 
-                "商务文档", "操作手册", "医疗健康", "政策法规"
-            }
+            return _correct_knowledge_base(result)
             
-            kb_name = result["knowledge_base_name"]
-            if kb_name not in preset_knowledge_bases:
-                # 如果不在预设列表中，标记为新知识库
-                result["is_new_knowledge_base"] = True
-                
-                # 但如果名称很相似，修正为预设名称
-                for preset in preset_knowledge_bases:
-                    if any(word in kb_name for word in preset.split()) or any(word in preset for word in kb_name.split()):
-                        result["knowledge_base_name"] = preset
-                        result["is_new_knowledge_base"] = False
-                        result["reason"] += f"（已修正为预设知识库：{preset}）"
-                        break
-            
-            return result
+        except Exception as e:
+            logger.warning(f"验证分析结果失败: {e}")
+            return _VALIDATE_FAILED_RESULT.copy()
+
+    @staticmethod
+    def parse_and_validate(response: str, filename: str) -> Dict:
+        """
+        解析LLM响应并验证修正结果
+        
+        等价于先 parse_llm_response 再 validate_analysis_result，
+        但只对JSON解析结果补默认字段（文本提取和失败结果本身已包含全部字段）。
+        
+        Args:
+            response: LLM原始响应
+            filename: 文件名
             
+        Returns:
+            验证后的结果
+        """
+        try:
+            parsed = _parse_json_object(response)
+            result = {**_ANALYSIS_DEFAULTS, **parsed} if parsed is not None else _regex_fallback(response)
+        except Exception as e:
+            logger.warning(f"解析LLM响应失败: {e}")
+            result = _PARSE_FAILED_RESULT.copy()
+        
+        try:
+            return _correct_knowledge_base(result)
         except Exception as e:
             logger.warning(f"验证分析结果失败: {e}")
-            return {
-                "knowledge_base_name": "通用文档",
-                "is_new_knowledge_base": False,
-                "document_type": "未知",
-                "reason": "验证失败，使用默认分类",
-                "confidence": 0.2
-            }
+            return _VALIDATE_FAILED_RESULT.copy()
 
     @staticmethod
     def get_document_processing_strategy(content_length: int) -> str:
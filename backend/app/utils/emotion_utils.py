@@ -5,10 +5,39 @@
 
 import re
 import logging
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# SenseVoice 标记，如 <|HAPPY|>、<|MUSIC|>
+_SENSEVOICE_TAG_RE = re.compile(r'<\|[A-Z_]+\|>')
+
+# emoji 字符范围
+_EMOJI_RE = re.compile("["
+                       u"\U0001F600-\U0001F64F"  # emoticons
+                       u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+                       u"\U0001F680-\U0001F6FF"  # transport & map symbols
+                       u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+                       "]+", flags=re.UNICODE)
+
+
+class EmotionResult(NamedTuple):
+    """情感分析的内部结果，只在对外返回时转成 dict"""
+    primary: str
+    confidence: float
+    details: Tuple[Tuple[str, float], ...]
+    raw_emotions: Tuple[str, ...]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "primary": self.primary,
+            "confidence": self.confidence,
+            "details": dict(self.details),
+            "raw_emotions": list(self.raw_emotions)
+        }
+
+
 class EmotionAnalyzer:
     """情感分析工具类"""
     
@@ -70,89 +99,84 @@ class EmotionAnalyzer:
             Dict[str, Any]: 情感分析结果
         """
         try:
-            if format_type == "sensevoice":
-                return EmotionAnalyzer._analyze_sensevoice_emotion(text)
-            else:
-                return EmotionAnalyzer._analyze_simple_emotion(text)
+            return _cached_emotion(text, format_type).to_dict()
                 
         except Exception as e:
             logger.error(f"❌ 情感分析失败: {e}")
             return {
-                "primary": "neutral",
+                "primary": "中性" if format_type == "sensevoice" else "neutral",
                 "confidence": 0.0,
                 "details": {},
                 "raw_emotions": []
             }
     
     @staticmethod
-    def _analyze_sensevoice_emotion(processed_text: str) -> Dict[str, Any]:
-        """分析SenseVoice格式的情感信息"""
-        try:
-            detected_emotions = {}
-            raw_emotions = []
-            
-            for emotion_en, emotion_zh in EmotionAnalyzer.SENSEVOICE_EMOTIONS.items():
-                if f"<|{emotion_en}|>" in processed_text:
-                    detected_emotions[emotion_zh] = 1.0
-                    raw_emotions.append(emotion_en)
-            
-            # 确定主要情感
-            if detected_emotions:
-                primary_emotion = max(detected_emotions.keys(), key=lambda k: detected_emotions[k])
-                confidence = detected_emotions[primary_emotion]
-            else:
-                primary_emotion = "中性"
-                confidence = 1.0
-            
-            return {
-                "primary": primary_emotion,
-                "confidence": confidence,
-                "details": detected_emotions,
-                "raw_emotions": raw_emotions
-            }
+    def analyze_emotion_batch(texts: List[str], format_type: str = "sensevoice") -> List[Dict[str, Any]]:
+        """
+        批量分析多段文本的情感信息
+        
+        结果与逐条调用 analyze_emotion 相同，省去每条文本的分发开销。
+        
+        Args:
+            texts: 输入文本列表
+            format_type: 格式类型 ("sensevoice" 或 "simple")
             
-        except Exception as e:
-            logger.error(f"❌ SenseVoice情感分析失败: {e}")
-            return {
-                "primary": "中性",
-                "confidence": 0.0,
-                "details": {},
-                "raw_emotions": []
-            }
+        Returns:
+            List[Dict[str, Any]]: 与输入顺序一致的情感分析结果
+        """
+        cached = _cached_emotion
+        neutral = "中性" if format_type == "sensevoice" else "neutral"
+        results = []
+        for text in texts:
+            try:
+                result = cached(text, format_type)
+            except Exception as e:
+                logger.error(f"❌ 情感分析失败: {e}")
+                result = EmotionResult(neutral, 0.0, (), ())
+            results.append(result.to_dict())
+        return results
     
     @staticmethod
-    def _analyze_simple_emotion(text: str) -> Dict[str, Any]:
+    def _analyze_sensevoice_emotion(processed_text: str) -> EmotionResult:
+        """分析SenseVoice格式的情感信息"""
+        # 大多数文本不含标记，直接返回中性结果
+        if '<|' not in processed_text:
+            return _SENSEVOICE_NEUTRAL
+        
+        # 单次扫描找出全部标记，按出现顺序去重后查表
+        tag_map = _EMOTION_TAG_MAP
+        hits = [
+            tag_map[tag]
+            for tag in dict.fromkeys(_SENSEVOICE_TAG_RE.findall(processed_text))
+            if tag in tag_map
+        ]
+        if not hits:
+            return _SENSEVOICE_NEUTRAL
+        
+        # 确定主要情感：检测到的情感置信度均为1.0，第一个即为主要情感
+        return EmotionResult(
+            hits[0][1],
+            1.0,
+            tuple((emotion_zh, 1.0) for _, emotion_zh in hits),
+            tuple(emotion_en for emotion_en, _ in hits)
+        )
+    
+    @staticmethod
+    def _analyze_simple_emotion(text: str) -> EmotionResult:
         """分析简单格式的情感信息"""
-        try:
-            detected_emotions = {}
-            
-            for emoji, emotion in EmotionAnalyzer.SIMPLE_EMOTIONS.items():
-                if emoji in text:
-                    detected_emotions[emotion] = 1.0
-            
-            # 确定主要情感
-            if detected_emotions:
-                primary_emotion = max(detected_emotions.keys(), key=lambda k: detected_emotions[k])
-                confidence = detected_emotions[primary_emotion]
-            else:
-                primary_emotion = "neutral"
-                confidence = 1.0
-            
-            return {
-                "primary": primary_emotion,
-                "confidence": confidence,
-                "details": detected_emotions,
-                "raw_emotions": list(detected_emotions.keys())
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ 简单情感分析失败: {e}")
-            return {
-                "primary": "neutral",
-                "confidence": 0.0,
-                "details": {},
-                "raw_emotions": []
-            }
+        # 单次扫描找出全部情感emoji，按出现顺序去重
+        emotions = EmotionAnalyzer.SIMPLE_EMOTIONS
+        detected = tuple(dict.fromkeys(emotions[emoji] for emoji in _SIMPLE_EMOTION_CHAR_RE.findall(text)))
+        if not detected:
+            return _SIMPLE_NEUTRAL
+        
+        # 确定主要情感：检测到的情感置信度均为1.0，第一个即为主要情感
+        return EmotionResult(
+            detected[0],
+            1.0,
+            tuple((emotion, 1.0) for emotion in detected),
+            detected
+        )
     
     @staticmethod
     def extract_event_info(processed_text: str, format_type: str = "sensevoice") -> List[str]:
@@ -167,10 +191,7 @@ class EmotionAnalyzer:
             List[str]: 检测到的事件列表
         """
         try:
-            if format_type == "sensevoice":
-                return EmotionAnalyzer._extract_sensevoice_events(processed_text)
-            else:
-                return EmotionAnalyzer._extract_simple_events(processed_text)
+            return list(_cached_events(processed_text, format_type))
                 
         except Exception as e:
             logger.error(f"❌ 声学事件提取失败: {e}")
@@ -179,34 +200,22 @@ class EmotionAnalyzer:
     @staticmethod
     def _extract_sensevoice_events(processed_text: str) -> List[str]:
         """提取SenseVoice格式的声学事件"""
-        try:
-            detected_events = []
-            
-            for event_en, event_zh in EmotionAnalyzer.SENSEVOICE_EVENTS.items():
-                if f"<|{event_en}|>" in processed_text:
-                    detected_events.append(event_zh)
-            
-            return detected_events
-            
-        except Exception as e:
-            logger.error(f"❌ SenseVoice声学事件提取失败: {e}")
+        if '<|' not in processed_text:
             return []
+        
+        # 单次扫描找出全部标记，按出现顺序去重后查表
+        return [
+            _EVENT_TAG_MAP[tag]
+            for tag in dict.fromkeys(_SENSEVOICE_TAG_RE.findall(processed_text))
+            if tag in _EVENT_TAG_MAP
+        ]
     
     @staticmethod
     def _extract_simple_events(text: str) -> List[str]:
         """提取简单格式的声学事件"""
-        try:
-            detected_events = []
-            
-            for emoji, event in EmotionAnalyzer.SIMPLE_EVENTS.items():
-                if emoji in text:
-                    detected_events.append(event)
-            
-            return detected_events
-            
-        except Exception as e:
-            logger.error(f"❌ 简单声学事件提取失败: {e}")
-            return []
+        # 单次扫描找出全部事件emoji，按出现顺序去重
+        events = EmotionAnalyzer.SIMPLE_EVENTS
+        return list(dict.fromkeys(events[emoji] for emoji in _SIMPLE_EVENT_CHAR_RE.findall(text)))
     
     @staticmethod
     def clean_text(text: str, format_type: str = "sensevoice") -> str:
@@ -221,10 +230,7 @@ class EmotionAnalyzer:
             str: 清理后的文本
         """
         try:
-            if format_type == "sensevoice":
-                return EmotionAnalyzer._clean_sensevoice_text(text)
-            else:
-                return EmotionAnalyzer._clean_simple_text(text)
+            return _cached_clean(text, format_type)
                 
         except Exception as e:
             logger.error(f"❌ 文本清理失败: {e}")
@@ -233,37 +239,71 @@ class EmotionAnalyzer:
     @staticmethod
     def _clean_sensevoice_text(text: str) -> str:
         """清理SenseVoice格式的文本"""
-        try:
-            # 移除情感标记
-            for emotion_en in EmotionAnalyzer.SENSEVOICE_EMOTIONS.keys():
-                text = text.replace(f"<|{emotion_en}|>", "")
-            
-            # 移除事件标记
-            for event_en in EmotionAnalyzer.SENSEVOICE_EVENTS.keys():
-                text = text.replace(f"<|{event_en}|>", "")
-            
+        if '<|' not in text:
             return text.strip()
-            
-        except Exception as e:
-            logger.error(f"❌ SenseVoice文本清理失败: {e}")
-            return text
+        
+        # 移除情感和事件标记（单次扫描）
+        return _SENSEVOICE_TAG_RE.sub('', text).strip()
     
     @staticmethod
     def _clean_simple_text(text: str) -> str:
         """清理简单格式的文本"""
-        try:
-            # 移除emoji
-            emoji_pattern = re.compile("["
-                                     u"\U0001F600-\U0001F64F"  # emoticons
-                                     u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                                     u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                                     u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                                     "]+", flags=re.UNICODE)
-            return emoji_pattern.sub('', text).strip()
+        # 移除emoji
+        return _EMOJI_RE.sub('', text).strip()
+    
+    @staticmethod
+    def extract_all(processed_text: str) -> Dict[str, Any]:
+        """
+        一次扫描SenseVoice文本，同时得到情感、声学事件和清理后的文本
+        
+        结果与分别调用 analyze_emotion / extract_event_info / clean_text 相同。
+        
+        Args:
+            processed_text: 处理后的文本
             
-        except Exception as e:
-            logger.error(f"❌ 简单文本清理失败: {e}")
-            return text
+        Returns:
+            Dict[str, Any]: {"emotion": 情感分析结果, "events": 事件列表, "clean_text": 清理后的文本}
+        """
+        detected_emotions = {}
+        raw_emotions = []
+        detected_events = {}
+        
+        if '<|' not in processed_text:
+            clean = processed_text.strip()
+        else:
+            parts = []
+            pos = 0
+            for match in _SENSEVOICE_TAG_RE.finditer(processed_text):
+                parts.append(processed_text[pos:match.start()])
+                pos = match.end()
+                
+                tag = match.group()
+                hit = _EMOTION_TAG_MAP.get(tag)
+                if hit is not None:
+                    emotion_en, emotion_zh = hit
+                    if emotion_zh not in detected_emotions:
+                        detected_emotions[emotion_zh] = 1.0
+                        raw_emotions.append(emotion_en)
+                elif tag in _EVENT_TAG_MAP:
+                    detected_events[_EVENT_TAG_MAP[tag]] = None
+            parts.append(processed_text[pos:])
+            clean = ''.join(parts).strip()
+        
+        if detected_emotions:
+            primary_emotion = next(iter(detected_emotions))
+        else:
+            primary_emotion = "中性"
+        
+        return {
+            "emotion": {
+                "primary": primary_emotion,
+                "confidence": 1.0,
+                "details": detected_emotions,
+                "raw_emotions": raw_emotions
+            },
+            "events": list(detected_events),
+            "clean_text": clean
+        }
     
     @staticmethod
     def generate_simple_response(user_text: str, emotion_info: Dict[str, Any]) -> str:
@@ -278,20 +318,77 @@ class EmotionAnalyzer:
             str: 回复文本
         """
         try:
-            primary_emotion = emotion_info.get("primary", "neutral")
+            template = _RESPONSE_TEMPLATES.get(emotion_info.get("primary"), _DEFAULT_RESPONSE_TEMPLATE)
+            return template.format(user_text)
             
-            if primary_emotion == "happy" or primary_emotion == "开心":
-                return f"很高兴听到你开心的话语！你说：「{user_text}」"
-            elif primary_emotion == "sad" or primary_emotion == "悲伤":
-                return f"我能感受到你的情绪，让我来帮助你。你说：「{user_text}」"
-            elif primary_emotion == "angry" or primary_emotion == "愤怒":
-                return f"我理解你的感受，让我们冷静地讨论一下。你说：「{user_text}」" 
-            else:
-                return f"我听到你说：「{user_text}」。有什么我可以帮助你的吗？"
-                
         except Exception as e:
             logger.error(f"❌ 生成回复失败: {e}")
-            return f"我听到你说：「{user_text}」。有什么我可以帮助你的吗？"
+            return _DEFAULT_RESPONSE_TEMPLATE.format(user_text)
+
+
+# 按主要情感（中英文）选择的回复模板
+_RESPONSE_TEMPLATES = {
+    "happy": "很高兴听到你开心的话语！你说：「{}」",
+    "开心": "很高兴听到你开心的话语！你说：「{}」",
+    "sad": "我能感受到你的情绪，让我来帮助你。你说：「{}」",
+    "悲伤": "我能感受到你的情绪，让我来帮助你。你说：「{}」",
+    "angry": "我理解你的感受，让我们冷静地讨论一下。你说：「{}」",
+    "愤怒": "我理解你的感受，让我们冷静地讨论一下。你说：「{}」",
+}
+_DEFAULT_RESPONSE_TEMPLATE = "我听到你说：「{}」。有什么我可以帮助你的吗？"
+
+# SenseVoice 标记 -> (英文名, 中文名) / 中文事件名
+_EMOTION_TAG_MAP = {
+    f"<|{emotion_en}|>": (emotion_en, emotion_zh)
+    for emotion_en, emotion_zh in EmotionAnalyzer.SENSEVOICE_EMOTIONS.items()
+}
+_EVENT_TAG_MAP = {
+    f"<|{event_en}|>": event_zh
+    for event_en, event_zh in EmotionAnalyzer.SENSEVOICE_EVENTS.items()
+}
+
+
+# 未检测到情感时的结果
+_SENSEVOICE_NEUTRAL = EmotionResult("中性", 1.0, (), ())
+_SIMPLE_NEUTRAL = EmotionResult("neutral", 1.0, (), ())
+
+
+# 简单格式的emoji都是单个字符，合成一个字符类即可单次扫描
+_SIMPLE_EMOTION_CHAR_RE = re.compile(
+    "[" + "".join(map(re.escape, EmotionAnalyzer.SIMPLE_EMOTIONS)) + "]"
+)
+_SIMPLE_EVENT_CHAR_RE = re.compile(
+    "[" + "".join(map(re.escape, EmotionAnalyzer.SIMPLE_EVENTS)) + "]"
+)
+
+
+# 同一段识别文本常被依次清理、提取情感和事件，按 (文本, 格式) 缓存结果。
+# 缓存中只存不可变的元组，公共方法每次返回新的 dict/list，调用方可以随意修改。
+_EMOTION_CACHE_SIZE = 512
+
+@lru_cache(maxsize=_EMOTION_CACHE_SIZE)
+def _cached_emotion(text: str, format_type: str) -> EmotionResult:
+    if format_type == "sensevoice":
+        return EmotionAnalyzer._analyze_sensevoice_emotion(text)
+    return EmotionAnalyzer._analyze_simple_emotion(text)
+
+@lru_cache(maxsize=_EMOTION_CACHE_SIZE)
+def _cached_events(text: str, format_type: str) -> Tuple[str, ...]:
+    if format_type == "sensevoice":
+        return tuple(EmotionAnalyzer._extract_sensevoice_events(text))
+    return tuple(EmotionAnalyzer._extract_simple_events(text))
+
+@lru_cache(maxsize=_EMOTION_CACHE_SIZE)
+def _cached_clean(text: str, format_type: str) -> str:
+    if format_type == "sensevoice":
+        return EmotionAnalyzer._clean_sensevoice_text(text)
+    return EmotionAnalyzer._clean_simple_text(text)
+
+def emotion_cache_clear() -> None:
+    """清空情感分析、事件提取和文本清理的结果缓存"""
+    _cached_emotion.cache_clear()
+    _cached_events.cache_clear()
+    _cached_clean.cache_clear()
 
 
 # 便利函数
@@ -303,6 +400,10 @@ def extract_emotion_info(processed_text: str, format_type: str = "sensevoice") -
     """提取情感信息便利函数"""
     return EmotionAnalyzer.analyze_emotion(processed_text, format_type)
 
+def extract_emotion_info_batch(texts: List[str], format_type: str = "sensevoice") -> List[Dict[str, Any]]:
+    """批量提取情感信息便利函数"""
+    return EmotionAnalyzer.analyze_emotion_batch(texts, format_type)
+
 def extract_event_info(processed_text: str, format_type: str = "sensevoice") -> List[str]:
     """提取事件信息便利函数"""
     return EmotionAnalyzer.extract_event_info(processed_text, format_type)
@@ -326,4 +427,8 @@ def extract_sensevoice_event_info(processed_text: str) -> List[str]:
 
 def clean_sensevoice_text(processed_text: str) -> str:
     """清理SenseVoice文本"""
-    return EmotionAnalyzer.clean_text(processed_text, "sensevoice")
\ No newline at end of file
+    return EmotionAnalyzer.clean_text(processed_text, "sensevoice")
+
+def extract_sensevoice_all(processed_text: str) -> Dict[str, Any]:
+    """一次提取SenseVoice情感、事件和清理后的文本"""
+    return EmotionAnalyzer.extract_all(processed_text)
\ No newline at end of file
@@ -4,13 +4,104 @@
 包含文件类型检测、文件处理等功能
 """
 
+import os
+import codecs
+import struct
 import mimetypes
 import logging
+from functools import lru_cache
 from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _mime_from_ext(ext: str) -> Optional[str]:
+    """根据扩展名（小写，含点号）查询MIME类型，上传文件的扩展名种类很少，结果缓存复用"""
+    return mimetypes.guess_type('x' + ext)[0]
+
+
+# ZIP本地文件头：签名、版本、标志、压缩方式、时间、日期、CRC、压缩后大小、原始大小、文件名长度、扩展字段长度
+_ZIP_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+_ZIP_MAX_ENTRIES = 8
+
+
+def _detect_zip(file_content: bytes, filename: str) -> Optional[str]:
+    """ZIP容器：按本地文件头逐个读取条目名，检查是否是DOCX文件"""
+    offset = 0
+    for _ in range(_ZIP_MAX_ENTRIES):
+        if offset + _ZIP_LOCAL_HEADER.size > len(file_content):
+            break
+        signature, _, flags, _, _, _, _, compressed_size, _, name_len, extra_len = \
+            _ZIP_LOCAL_HEADER.unpack_from(file_content, offset)
+        if signature != b'PK\x03\x04':
+            break
+        name_start = offset + _ZIP_LOCAL_HEADER.size
+        if file_content[name_start:name_start + 5] == b'word/':
+            return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        if flags & 0x08:
+            # 条目大小记录在数据之后，无法跳到下一个文件头，退回到扫描开头的字节
+            if b'word/' in file_content[:1024]:
+                return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            break
+        offset = name_start + name_len + extra_len + compressed_size
+    return None
+
+
+def _detect_riff(file_content: bytes, filename: str) -> Optional[str]:
+    """RIFF容器：区分WebP图片和WAV音频"""
+    form_type = file_content[8:12]
+    if form_type == b'WEBP':
+        return 'image/webp'
+    if form_type == b'WAVE':
+        return 'audio/wav'
+    return None
+
+
+# Microsoft Office 老格式 (.doc, .xls, .ppt) 共用同一个签名，只能靠扩展名区分
+_OLE_MIME_BY_EXT = (
+    ('.doc', 'application/msword'),
+    ('.xls', 'application/vnd.ms-excel'),
+    ('.ppt', 'application/vnd.ms-powerpoint'),
+)
+
+
+def _detect_ole(file_content: bytes, filename: str) -> Optional[str]:
+    """OLE复合文档：根据扩展名区分Office老格式"""
+    lower_name = filename.lower()
+    for ext, mime_type in _OLE_MIME_BY_EXT:
+        if lower_name.endswith(ext):
+            return mime_type
+    return None
+
+
+# 文件签名（魔数）表：(签名, MIME类型或容器格式的判定函数)
+_FILE_SIGNATURES = (
+    (b'%PDF', 'application/pdf'),
+    (b'PK\x03\x04', _detect_zip),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'RIFF', _detect_riff),
+    (b'ID3', 'audio/mpeg'),
+    (b'\xff\xfb', 'audio/mpeg'),
+    (b'\xff\xf3', 'audio/mpeg'),
+    (b'\xff\xf2', 'audio/mpeg'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', _detect_ole),
+)
+
+# 按签名前2个字节分组，检测时一次字典查找即可拿到候选签名
+_SIGNATURE_PREFIX_LEN = 2
+_SIGNATURES_BY_PREFIX: Dict[bytes, list] = {}
+for _signature, _resolver in _FILE_SIGNATURES:
+    _SIGNATURES_BY_PREFIX.setdefault(_signature[:_SIGNATURE_PREFIX_LEN], []).append((_signature, _resolver))
+del _signature, _resolver
+
+
 class FileTypeDetector:
     """文件类型检测工具类"""
     
@@ -40,6 +131,9 @@ class FileTypeDetector:
         'audio/mp3': 'MP3音频文件'
     }
     
+    # 类型检测只需要文件开头的字节
+    HEADER_SIZE = 4096
+    
     @staticmethod
     def detect_file_type(file_content: bytes, filename: str) -> str:
         """
@@ -49,56 +143,52 @@ class FileTypeDetector:
             file_content: 文件内容字节
             filename: 文件名
             
+        Returns:
+            文件的MIME类型
+        """
+        return FileTypeDetector.detect_file_type_header(
+            file_content[:FileTypeDetector.HEADER_SIZE], filename
+        )
+    
+    @staticmethod
+    def detect_file_type_header(header: bytes, filename: str) -> str:
+        """
+        根据文件开头的字节检测文件类型，调用方只需读取前 HEADER_SIZE 字节
+        
+        Args:
+            header: 文件开头的字节
+            filename: 文件名
+            
         Returns:
             文件的MIME类型
         """
         try:
-            # 先尝试根据文件名检测
-            mime_type, _ = mimetypes.guess_type(filename)
-            if mime_type:
-                return mime_type
+            # 先尝试根据扩展名检测，没有扩展名时直接看文件签名
+            ext = os.path.splitext(filename)[1].lower()
+            if ext:
+                mime_type = _mime_from_ext(ext)
+                if mime_type:
+                    return mime_type
             
             # 检查文件签名（魔数）
-            if file_content.startswith(b'%PDF'):
-                return 'application/pdf'
-            elif file_content.startswith(b'PK\x03\x04'):
-                # 检查是否是DOCX文件
-                if b'word/' in file_content[:1024]:
-                    return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            elif file_content.startswith((b'\xff\xd8\xff', b'\x89PNG')):
-                # JPEG或PNG图片
-                return 'image/jpeg' if file_content.startswith(b'\xff\xd8\xff') else 'image/png'
-            elif file_content.startswith(b'\x89PNG\r\n\x1a\n'):
-                return 'image/png'
-            elif file_content.startswith(b'GIF87a') or file_content.startswith(b'GIF89a'):
-                return 'image/gif'
-            elif file_content.startswith(b'BM'):
-                return 'image/bmp'
-            elif file_content.startswith((b'II*\x00', b'MM\x00*')):
-                return 'image/tiff'
-            elif file_content.startswith(b'RIFF') and b'WEBP' in file_content[:12]:
-                return 'image/webp'
-            elif file_content.startswith(b'RIFF') and b'WAVE' in file_content[:12]:
-                return 'audio/wav'
-            elif file_content.startswith((b'ID3', b'\xff\xfb', b'\xff\xf3', b'\xff\xf2')):
-                return 'audio/mpeg'
-            elif file_content.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
-                # Microsoft Office 老格式 (.doc, .xls, .ppt)
-                if filename.lower().endswith('.doc'):
-                    return 'application/msword'
-                elif filename.lower().endswith('.xls'):
-                    return 'application/vnd.ms-excel'
-                elif filename.lower().endswith('.ppt'):
-                    return 'application/vnd.ms-powerpoint'
+            for signature, resolver in _SIGNATURES_BY_PREFIX.get(header[:_SIGNATURE_PREFIX_LEN], ()):
+                if header.startswith(signature):
+                    mime_type = resolver if isinstance(resolver, str) else resolver(header, filename)
+                    if mime_type:
+                        return mime_type
+                    break
             
-            # 尝试检测文本文件
-            try:
-                # 检查前1024字节是否为有效文本
-                sample = file_content[:1024]
-                sample.decode('utf-8')
-                return 'text/plain'
-            except UnicodeDecodeError:
-                pass
+            # 尝试检测文本文件：检查前1024字节，含NUL字节的视为二进制
+            sample = header[:1024]
+            if b'\x00' not in sample:
+                # 纯ASCII无需解码；否则用增量解码器校验UTF-8，截断在末尾的多字节字符不算错误
+                if sample.isascii():
+                    return 'text/plain'
+                try:
+                    codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+                    return 'text/plain'
+                except UnicodeDecodeError:
+                    pass
             
             # 默认返回二进制文件类型
             return 'application/octet-stream'
@@ -233,6 +323,11 @@ def detect_file_type(file_content: bytes, filename: str) -> str:
     return FileTypeDetector.detect_file_type(file_content, filename)
 
 
+def detect_file_type_header(header: bytes, filename: str) -> str:
+    """根据文件开头的字节检测文件类型"""
+    return FileTypeDetector.detect_file_type_header(header, filename)
+
+
 def get_supported_file_types() -> Dict[str, str]:
     """获取支持的文件类型"""
     return FileTypeDetector.get_supported_file_types()
@@ -12,6 +12,43 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 增强流程的锐化卷积核
+_ENHANCE_SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]], dtype=np.float32)
+# 与 PIL ImageFilter.SHARPEN 相同的卷积核
+_PIL_SHARPEN_KERNEL = np.array([[-2, -2, -2], [-2, 32, -2], [-2, -2, -2]], dtype=np.float32) / 16
+
+# 亮度通道去噪方式，由 settings.ocr_denoise_mode 选择；双边滤波和中值滤波比非局部均值快一个数量级以上
+_DENOISERS = {
+    "bilateral": lambda l: cv2.bilateralFilter(l, 5, 35, 35),
+    "median": lambda l: cv2.medianBlur(l, 3),
+    "nlmeans": lambda l: cv2.fastNlMeansDenoising(l, None, 10, 7, 21),
+}
+
+# 可以直接转成8位数组交给 cv2.resize 的图像模式
+_CV_RESIZE_MODES = frozenset(('L', 'RGB', 'RGBA'))
+
+# OCR预处理在增强之后额外做的对比度和亮度调整
+_OCR_CONTRAST = 1.2
+_OCR_BRIGHTNESS = 1.1
+
+
+def _to_rgb_array(image: Image.Image) -> np.ndarray:
+    """PIL图像转为RGB数组"""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image)
+
+
+def _apply_contrast_brightness(pixels: np.ndarray, mean: float, contrast: float, brightness: float) -> np.ndarray:
+    """
+    对RGB或灰度数组做 PIL ImageEnhance 先 Contrast 后 Brightness 的调整：
+    围绕灰度均值（与PIL一样取整）拉伸后整体缩放，合成一张256项查找表一次完成
+    """
+    mean = int(mean + 0.5)
+    table = np.arange(256, dtype=np.float32) * contrast + mean * (1.0 - contrast)
+    table = np.clip(table * brightness + 0.5, 0, 255).astype(np.uint8)
+    return cv2.LUT(pixels, table)
+
 
 class ImageProcessor:
     """图像处理工具类"""
@@ -31,34 +68,57 @@ class ImageProcessor:
             return image
             
         try:
-            # 转换为RGB模式
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # 转换为OpenCV格式
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # 1. 去噪
-            cv_image = cv2.fastNlMeansDenoisingColored(cv_image, None, 10, 10, 7, 21)
-            
-            # 2. 锐化
-            kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-            cv_image = cv2.filter2D(cv_image, -1, kernel)
-            
-            # 3. 对比度自适应均衡化
-            lab = cv2.cvtColor(cv_image, cv2.COLOR_BGR2LAB)
-            l, a, b = cv2.split(lab)
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            l = clahe.apply(l)
-            cv_image = cv2.cvtColor(cv2.merge([l, a, b]), cv2.COLOR_LAB2BGR)
-            
-            # 转换回PIL格式
-            return Image.fromarray(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB))
+            return Image.fromarray(ImageProcessor._enhance_luminance(_to_rgb_array(image)))
             
         except Exception as e:
             logger.warning(f"图像增强失败，返回原图像: {e}")
             return image
     
+    @staticmethod
+    def _enhance_luminance(
+        rgb: np.ndarray,
+        contrast: float = 1.0,
+        brightness: float = 1.0,
+        final_sharpen: bool = False
+    ) -> np.ndarray:
+        """
+        在LAB空间中只对亮度通道去噪、锐化和均衡化，A/B通道保持不变，只做一次色彩空间往返；
+        之后的对比度、亮度和最终锐化与PIL一样作用在RGB数组上
+        
+        Args:
+            rgb: RGB图像数组
+            contrast: 对比度因子（与 PIL ImageEnhance.Contrast 含义相同）
+            brightness: 亮度因子（与 PIL ImageEnhance.Brightness 含义相同）
+            final_sharpen: 是否最后再用 PIL SHARPEN 的卷积核锐化一次
+            
+        Returns:
+            增强后的RGB图像数组
+        """
+        lab = cv2.cvtColor(rgb, cv2.COLOR_RGB2LAB)
+        l, a, b = cv2.split(lab)
+        
+        # 1. 去噪
+        l = _DENOISERS.get(settings.ocr_denoise_mode, _DENOISERS["bilateral"])(l)
+        
+        # 2. 锐化
+        l = cv2.filter2D(l, -1, _ENHANCE_SHARPEN_KERNEL)
+        
+        # 3. 对比度自适应均衡化
+        l = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(l)
+        
+        result = cv2.cvtColor(cv2.merge([l, a, b]), cv2.COLOR_LAB2RGB)
+        
+        # 4. 对比度和亮度：与 PIL 一样在RGB上围绕灰度均值调整
+        if contrast != 1.0 or brightness != 1.0:
+            gray_mean = cv2.mean(cv2.cvtColor(result, cv2.COLOR_RGB2GRAY))[0]
+            result = _apply_contrast_brightness(result, gray_mean, contrast, brightness)
+        
+        # 5. 最终锐化
+        if final_sharpen:
+            result = cv2.filter2D(result, -1, _PIL_SHARPEN_KERNEL)
+        
+        return result
+    
     @staticmethod
     def preprocess_for_ocr(image: Image.Image) -> Image.Image:
         """
@@ -71,20 +131,29 @@ class ImageProcessor:
             预处理后的图像
         """
         try:
-            # 图像增强
-            enhanced = ImageProcessor.enhance_image(image)
-            
-            # 亮度和对比度调整
-            enhancer = ImageEnhance.Contrast(enhanced)
-            enhanced = enhancer.enhance(1.2)
-            
-            enhancer = ImageEnhance.Brightness(enhanced)
-            enhanced = enhancer.enhance(1.1)
-            
-            # 锐化
-            enhanced = enhanced.filter(ImageFilter.SHARPEN)
+            # 整个流程都在同一个数组上完成，只在入口和出口与PIL转换一次
+            if settings.ocr_image_enhance:
+                # 亮度通道上去噪、锐化、均衡化后转回RGB，再做与PIL相同的对比度、亮度和锐化
+                result = ImageProcessor._enhance_luminance(
+                    _to_rgb_array(image),
+                    contrast=_OCR_CONTRAST,
+                    brightness=_OCR_BRIGHTNESS,
+                    final_sharpen=True
+                )
+            else:
+                # 灰度图保持单通道，其他模式统一按RGB处理
+                if image.mode != 'L':
+                    image = image.convert('RGB')
+                pixels = np.asarray(image)
+                
+                # 亮度和对比度调整
+                gray = pixels if pixels.ndim == 2 else cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+                result = _apply_contrast_brightness(pixels, cv2.mean(gray)[0], _OCR_CONTRAST, _OCR_BRIGHTNESS)
+                
+                # 锐化
+                result = cv2.filter2D(result, -1, _PIL_SHARPEN_KERNEL)
             
-            return enhanced
+            return Image.fromarray(result)
             
         except Exception as e:
             logger.warning(f"OCR预处理失败，返回原图像: {e}")
@@ -240,7 +309,14 @@ class ImageProcessor:
             new_width = int(width * scale)
             new_height = int(height * scale)
             
-            # 使用LANCZOS算法进行高质量缩放
+            # 这里只会缩小：常见模式用OpenCV区域插值，缩小效果更好且比LANCZOS快得多
+            if image.mode in _CV_RESIZE_MODES:
+                resized = cv2.resize(
+                    np.asarray(image), (new_width, new_height), interpolation=cv2.INTER_AREA
+                )
+                return Image.fromarray(resized)
+            
+            # 其他模式（调色板、16位等）使用LANCZOS算法进行高质量缩放
             return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
         except Exception as e:
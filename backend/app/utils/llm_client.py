@@ -3,15 +3,39 @@ LLM客户端工具类
 """
 
 import httpx
+import orjson
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 所有请求复用同一个连接池，保持长连接，避免每次请求重新建立TCP/TLS连接
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端，首次使用或关闭后重新创建"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+        )
+    return _client
+
+
 class LLMClient:
     """LLM客户端工具类"""
     
+    @staticmethod
+    async def close() -> None:
+        """关闭共享的HTTP客户端（应用关闭时调用）"""
+        global _client
+        if _client is not None:
+            await _client.aclose()
+            _client = None
+    
     @staticmethod
     async def make_llm_request(system_prompt: str, user_prompt: str) -> str:
         """
@@ -24,34 +48,62 @@ class LLMClient:
         Returns:
             LLM响应内容
         """
+        # 以流式方式接收并拼接，不再等待并解析完整的响应JSON
+        chunks = []
+        async for chunk in LLMClient.make_llm_request_stream(system_prompt, user_prompt):
+            chunks.append(chunk)
+        return ''.join(chunks)
+    
+    @staticmethod
+    async def make_llm_request_stream(system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """
+        向LM Studio发送流式请求，逐段返回生成的内容
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            
+        Yields:
+            LLM生成的内容片段
+        """
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                payload = {
-                    "model": settings.lm_studio_model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "temperature": 0.3,  # 较低的温度以获得更一致的分析结果
-                    "max_tokens": 1000,
-                    "stream": False
+            payload = {
+                "model": settings.lm_studio_model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                "temperature": 0.3,  # 较低的温度以获得更一致的分析结果
+                "max_tokens": 1000,
+                "stream": True
+            }
+            
+            async with _get_client().stream(
+                "POST",
+                f"{settings.lm_studio_base_url}/chat/completions",
+                content=orjson.dumps(payload),
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {settings.lm_studio_api_key}"
                 }
-                
-                response = await client.post(
-                    f"{settings.lm_studio_base_url}/chat/completions",
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {settings.lm_studio_api_key}"
-                    }
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
                     logger.error(f"LLM请求失败: {response.status_code} - {response.text}")
                     raise Exception(f"LLM请求失败: {response.status_code}")
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]  # 移除 "data: " 前缀
+                    if data == "[DONE]":
+                        break
+                    try:
+                        delta = orjson.loads(data)["choices"][0]["delta"]
+                    except (orjson.JSONDecodeError, KeyError, IndexError):
+                        continue
+                    if content := delta.get("content"):
+                        yield content
                     
         except Exception as e:
             logger.error(f"LLM请求异常: {e}")
@@ -92,11 +144,8 @@ class LLMClient:
             # 调用LLM
             response = await LLMClient.make_llm_request(system_prompt, user_prompt)
             
-            # 解析LLM响应
-            analysis_result = DocumentAnalyzer.parse_llm_response(response)
-            
-            # 验证和修正结果
-            return DocumentAnalyzer.validate_analysis_result(analysis_result, filename)
+            # 解析LLM响应并验证修正结果
+            return DocumentAnalyzer.parse_and_validate(response, filename)
             
         except Exception as e:
             logger.error(f"LLM分析调用失败: {e}")
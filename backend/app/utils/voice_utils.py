@@ -2,14 +2,108 @@
 语音处理工具类
 """
 
-import re
 import os
+import re
 import base64
+import time
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, List, NamedTuple, Optional
 
 logger = logging.getLogger(__name__)
 
+# 语音流水线专用线程池，阻塞的ASR/TTS调用不占用事件循环默认线程池
+VOICE_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("VOICE_POOL", "4")),
+    thread_name_prefix="voice"
+)
+
+# 表情符号（更全面的Unicode范围）
+_EMOJI_RE = re.compile(
+    '['
+    '\U0001F600-\U0001F64F'  # 表情符号
+    '\U0001F300-\U0001F5FF'  # 符号和图标
+    '\U0001F680-\U0001F6FF'  # 交通和地图符号
+    '\U0001F700-\U0001F77F'  # 炼金术符号
+    '\U0001F780-\U0001F7FF'  # 几何图形扩展
+    '\U0001F800-\U0001F8FF'  # 补充箭头-C
+    '\U0001F900-\U0001F9FF'  # 补充符号和图标
+    '\U0001FA00-\U0001FA6F'  # 扩展-A
+    '\U0001FA70-\U0001FAFF'  # 符号和图标扩展-A
+    '\U00002600-\U000026FF'  # 杂项符号
+    '\U00002700-\U000027BF'  # 装饰符号
+    '\U0000FE00-\U0000FE0F'  # 变体选择器
+    ']'
+)
+
+# Markdown格式
+_MD_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_MD_ITALIC_RE = re.compile(r'\*(.*?)\*')
+_MD_CODE_RE = re.compile(r'`(.*?)`')
+_MD_HEADING_RE = re.compile(r'#{1,6}\s*(.*)')
+_MD_LINK_RE = re.compile(r'\[(.*?)\]\(.*?\)')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_THINK_OPEN = '<think>'
+_THINK_CLOSE = '</think>'
+
+# 流式分句：句子结束符优先，过长时在软分割符处强制切分
+_SENTENCE_ENDINGS = '。！？.!?\n'
+_SPLIT_CHARS = ' ，,、；;'
+_FORCE_SPLIT_LENGTH = 100
+
+# 流式语音合成参数
+_TTS_VOICE = "zh-CN-XiaoxiaoNeural"
+_TTS_RATE = "+0%"
+_TTS_VOLUME = "+0%"
+
+# 短句TTS结果缓存（LRU），"好的"、"请稍等"等重复句子直接从内存返回
+_TTS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_TTS_CACHE_MAX_TEXT_LEN = 200
+_tts_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_tts_cache_bytes = 0
+
+
+def _tts_cache_key(text: str, voice: str, rate: str) -> tuple:
+    return (voice, rate, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+
+
+def _tts_cache_get(key: tuple) -> Optional[bytes]:
+    audio = _tts_cache.get(key)
+    if audio is not None:
+        _tts_cache.move_to_end(key)
+    return audio
+
+
+def _tts_cache_put(key: tuple, audio: bytes) -> None:
+    """写入缓存，超出字节上限时按LRU顺序淘汰"""
+    global _tts_cache_bytes
+    if len(audio) > _TTS_CACHE_MAX_BYTES:
+        return
+    old = _tts_cache.pop(key, None)
+    if old is not None:
+        _tts_cache_bytes -= len(old)
+    _tts_cache[key] = audio
+    _tts_cache_bytes += len(audio)
+    while _tts_cache_bytes > _TTS_CACHE_MAX_BYTES:
+        _, evicted = _tts_cache.popitem(last=False)
+        _tts_cache_bytes -= len(evicted)
+
+
+def _strip_emoji_and_markdown(text: str) -> str:
+    """移除表情符号和Markdown格式"""
+    text = _EMOJI_RE.sub('', text)
+    text = _MD_BOLD_RE.sub(r'\1', text)
+    text = _MD_ITALIC_RE.sub(r'\1', text)      # 斜体
+    text = _MD_CODE_RE.sub(r'\1', text)        # 代码
+    text = _MD_HEADING_RE.sub(r'\1', text)     # 标题
+    text = _MD_LINK_RE.sub(r'\1', text)        # 链接
+    return text
+
 
 class VoiceProcessor:
     """语音处理工具类"""
@@ -64,30 +158,11 @@ class VoiceProcessor:
         # 移除不完整的思考标签（只有开始标签的情况）
         cleaned = re.sub(r'<think>.*$', '', cleaned)
         
-        # 移除表情符号（更全面的Unicode范围）
-        # Emoticons and symbols
-        cleaned = re.sub(r'[\U0001F600-\U0001F64F]', '', cleaned)  # 表情符号
-        cleaned = re.sub(r'[\U0001F300-\U0001F5FF]', '', cleaned)  # 符号和图标
-        cleaned = re.sub(r'[\U0001F680-\U0001F6FF]', '', cleaned)  # 交通和地图符号
-        cleaned = re.sub(r'[\U0001F700-\U0001F77F]', '', cleaned)  # 炼金术符号
-        cleaned = re.sub(r'[\U0001F780-\U0001F7FF]', '', cleaned)  # 几何图形扩展
-        cleaned = re.sub(r'[\U0001F800-\U0001F8FF]', '', cleaned)  # 补充箭头-C
-        cleaned = re.sub(r'[\U0001F900-\U0001F9FF]', '', cleaned)  # 补充符号和图标
-        cleaned = re.sub(r'[\U0001FA00-\U0001FA6F]', '', cleaned)  # 扩展-A
-        cleaned = re.sub(r'[\U0001FA70-\U0001FAFF]', '', cleaned)  # 符号和图标扩展-A
-        cleaned = re.sub(r'[\U00002600-\U000026FF]', '', cleaned)  # 杂项符号
-        cleaned = re.sub(r'[\U00002700-\U000027BF]', '', cleaned)  # 装饰符号
-        cleaned = re.sub(r'[\U0000FE00-\U0000FE0F]', '', cleaned)  # 变体选择器
-        
-        # 移除Markdown格式（可选，已有的清理逻辑）
-        cleaned = re.sub(r'\*\*(.*?)\*\*', r'\1', cleaned)
-        cleaned = re.sub(r'\*(.*?)\*', r'\1', cleaned)      # 斜体
-        cleaned = re.sub(r'`(.*?)`', r'\1', cleaned)        # 代码
-        cleaned = re.sub(r'#{1,6}\s*(.*)', r'\1', cleaned) # 标题
-        cleaned = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', cleaned)  # 链接
+        # 移除表情符号和Markdown格式
+        cleaned = _strip_emoji_and_markdown(cleaned)
         
         # 移除多余的空白字符
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = _WHITESPACE_RE.sub(' ', cleaned).strip()
         
         return cleaned
 
@@ -270,30 +345,33 @@ class VoiceProcessor:
                 logger.info(f"跳过TTS: 文本过短, 长度: {len(clean_text)}, 内容: {repr(clean_text)}")
                 return None
             
-            logger.info(f"🎵 开始TTS合成: {repr(clean_text[:100])}{'...' if len(clean_text) > 100 else ''}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("🎵 开始TTS合成: %r%s", clean_text[:100], '...' if len(clean_text) > 100 else '')
                 
+            # 短句优先查缓存
+            cache_key = None
+            if len(clean_text) < _TTS_CACHE_MAX_TEXT_LEN:
+                cache_key = _tts_cache_key(clean_text, _TTS_VOICE, _TTS_RATE)
+                cached = _tts_cache_get(cache_key)
+                if cached is not None:
+                    logger.info("✅ TTS缓存命中: %d 字节", len(cached))
+                    return cached
+            
             # 延迟导入避免循环导入
             from app.services.tts_service import tts_service
             
-            # 调用TTS服务
-            audio_path, file_size = await tts_service.text_to_speech(
+            # 调用TTS服务，音频直接在内存中返回，不经过临时文件
+            audio_data = await tts_service.synthesize_to_bytes(
                 text=clean_text,
-                voice="zh-CN-XiaoxiaoNeural",
-                rate="+0%",
-                volume="+0%"
+                voice=_TTS_VOICE,
+                rate=_TTS_RATE,
+                volume=_TTS_VOLUME
             )
             
-            # 读取音频文件
-            with open(audio_path, "rb") as audio_file:
-                audio_data = audio_file.read()
-            
-            # 清理临时文件
-            try:
-                os.remove(audio_path)
-            except Exception as e:
-                logger.warning(f"清理临时TTS文件失败: {e}")
+            if cache_key is not None:
+                _tts_cache_put(cache_key, audio_data)
             
-            logger.info(f"✅ TTS合成成功: {file_size} 字节")
+            logger.info("✅ TTS合成成功: %d 字节", len(audio_data))
             return audio_data
             
         except ValueError as ve:
@@ -305,6 +383,331 @@ class VoiceProcessor:
             return None
 
 
+class IncrementalSpeechCleaner:
+    """
+    增量式语音文本清理器
+    
+    流式场景下只清理新增的文本片段，避免每个片段都重新清理整个缓冲区。
+    跨片段的思考标签通过嵌套深度跟踪，可能被截断的思考标签暂存在 carry 中，
+    末尾未闭合的Markdown标记（已是可见文本）暂存在 hold 中，等待后续片段补全后再输出。
+    """
+    
+    # 暂存的未闭合Markdown标记最长字符数，超过后直接输出
+    CARRY_LIMIT = 32
+    
+    def __init__(self):
+        self._carry = ""
+        self._hold = ""
+        self._think_depth = 0
+        self._at_space = True  # 已输出文本为空或以空格结尾
+    
+    def feed(self, delta: str) -> str:
+        """输入新的原始文本片段，返回新增的已清理文本"""
+        text = self._carry + delta
+        self._carry = ""
+        visible = self._hold + self._remove_think(text)
+        self._hold = ""
+        visible = self._hold_open_markup(visible)
+        return self._normalize(visible)
+    
+    def flush(self) -> str:
+        """流结束时输出暂存的剩余文本"""
+        held, self._hold = self._hold, ""
+        text, self._carry = self._carry, ""
+        if self._think_depth:
+            # 未闭合的思考标签，丢弃其后的全部内容；标签之前暂存的可见文本照常输出
+            return self._normalize(held)
+        return self._normalize(held + text)
+    
+    def _remove_think(self, text: str) -> str:
+        """移除思考标签及其内容，返回可见文本"""
+        parts = []
+        pos = 0
+        while True:
+            if self._think_depth == 0:
+                start = text.find(_THINK_OPEN, pos)
+                if start == -1:
+                    partial = self._partial_tag_start(text, pos)
+                    parts.append(text[pos:partial])
+                    self._carry = text[partial:]
+                    break
+                parts.append(text[pos:start])
+                self._think_depth = 1
+                pos = start + len(_THINK_OPEN)
+            else:
+                open_pos = text.find(_THINK_OPEN, pos)
+                close_pos = text.find(_THINK_CLOSE, pos)
+                if close_pos == -1 and open_pos == -1:
+                    self._carry = text[self._partial_tag_start(text, pos):]
+                    break
+                if open_pos != -1 and (close_pos == -1 or open_pos < close_pos):
+                    self._think_depth += 1
+                    pos = open_pos + len(_THINK_OPEN)
+                else:
+                    self._think_depth -= 1
+                    pos = close_pos + len(_THINK_CLOSE)
+        return ''.join(parts)
+    
+    @staticmethod
+    def _partial_tag_start(text: str, pos: int) -> int:
+        """返回末尾可能被截断的思考标签起始位置，没有则返回文本长度"""
+        start = text.rfind('<', max(pos, len(text) - len(_THINK_CLOSE) + 1))
+        if start != -1:
+            tail = text[start:]
+            if _THINK_OPEN.startswith(tail) or _THINK_CLOSE.startswith(tail):
+                return start
+        return len(text)
+    
+    def _hold_open_markup(self, visible: str) -> str:
+        """将末尾未闭合的Markdown标记暂存，避免标记被拆开后残留"""
+        hold = len(visible)
+        for marker in ('*', '`'):
+            if visible.count(marker) % 2:
+                hold = min(hold, visible.rfind(marker))
+        bracket = visible.rfind('[')
+        if bracket != -1 and visible.find(')', bracket) == -1:
+            hold = min(hold, bracket)
+        if hold < len(visible) and len(visible) - hold <= self.CARRY_LIMIT:
+            self._hold = visible[hold:]
+            return visible[:hold]
+        return visible
+    
+    def _normalize(self, visible: str) -> str:
+        """清理表情符号和Markdown，并合并跨片段的空白字符"""
+        if not visible:
+            return ""
+        cleaned = _WHITESPACE_RE.sub(' ', _strip_emoji_and_markdown(visible))
+        if self._at_space:
+            cleaned = cleaned.lstrip(' ')
+        if cleaned:
+            self._at_space = cleaned.endswith(' ')
+        return cleaned
+
+
+class SpeechChunk(NamedTuple):
+    """并行合成完成的语音块"""
+    text: str
+    audio: Optional[bytes]
+    error: Optional[Exception] = None
+    is_final: bool = False
+
+
+class OrderedSpeechSynthesizer:
+    """
+    并行语音合成器
+    
+    提交的句子由多个worker并行合成，results() 按提交顺序产出结果，
+    使LLM流的消费不必等待每个句子的TTS往返。待输出的句子数量受
+    queue_size 限制，超过时 submit 会等待，形成背压。
+    """
+    
+    def __init__(self, max_parallel: int = 3, queue_size: int = 8):
+        self.max_parallel = max(1, max_parallel)
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._work: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._closed = False
+    
+    async def __aenter__(self) -> "OrderedSpeechSynthesizer":
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_parallel)]
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def submit(self, text: str, is_final: bool = False):
+        """提交一个待合成的句子"""
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((text, is_final, future))
+        self._work.put_nowait((text, future))
+    
+    def close(self):
+        """
+        标记不再提交新句子，results() 输出完已提交的句子后结束
+        
+        不会等待队列空位，生产者被取消时也可以在 finally 中安全调用。
+        """
+        self._closed = True
+        try:
+            self._pending.put_nowait(None)
+        except asyncio.QueueFull:
+            # 队列已满时 results() 在取空队列后根据 _closed 结束
+            pass
+    
+    async def results(self) -> AsyncGenerator[SpeechChunk, None]:
+        """按提交顺序产出合成结果"""
+        while not (self._closed and self._pending.empty()):
+            item = await self._pending.get()
+            if item is None:
+                return
+            text, is_final, future = item
+            try:
+                audio = await future
+                yield SpeechChunk(text, audio, is_final=is_final)
+            except Exception as e:
+                yield SpeechChunk(text, None, error=e, is_final=is_final)
+    
+    async def _worker(self):
+        while True:
+            text, future = await self._work.get()
+            if future.done():
+                continue
+            try:
+                audio = await synthesize_speech_chunk(text)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(audio)
+
+
+def find_split_index(text: str) -> int:
+    """
+    查找流式文本的切分位置
+    
+    优先返回最后一个句子结束符的位置；文本超过100个字符仍无结束符时，
+    返回第21~80个字符之间最靠后的软分割符位置；都没有时返回-1。
+    """
+    split = max(text.rfind(c) for c in _SENTENCE_ENDINGS)
+    if split >= 0 or len(text) <= _FORCE_SPLIT_LENGTH:
+        return split
+    split = max(text.rfind(c, 21, 81) for c in _SPLIT_CHARS)
+    return split if split > 20 else -1
+
+
+# 新增文本累积到该长度（或出现句子结束标记）后才进行清理和分句
+MIN_SEGMENT_TRIGGER = 40
+
+# 语音对话的AI聊天请求参数（内部构造 ChatRequest 时使用，跳过pydantic校验）
+VOICE_CHAT_REQUEST_DEFAULTS = {
+    "history": (),  # 可以根据需要添加历史记录
+    "temperature": 0.7,
+    "max_tokens": 2048,
+    "stream": True
+}
+
+
+async def produce_speech_sentences(
+    text_stream: AsyncIterator[str],
+    synthesizer: OrderedSpeechSynthesizer,
+    send_text: Optional[Callable[[str], Awaitable[None]]] = None
+) -> str:
+    """
+    消费AI文字流，切分出完整句子提交TTS合成，返回完整的AI回复
+    
+    Args:
+        text_stream: AI回复的文字片段流
+        synthesizer: 并行语音合成器，结束时（包括被取消时）会调用其 close()
+        send_text: 发送每个文字片段的回调，为None时不发送
+        
+    Returns:
+        str: 完整的AI回复
+    """
+    text_parts: List[str] = []  # AI回复片段，结束时再拼接
+    cleaner = IncrementalSpeechCleaner()
+    cleaned_buffer = ""  # 已清理的文本，只增不减
+    pending_delta = ""  # 尚未清理和分句的新增文本
+    processed_text_length = 0  # 记录已处理的文本长度
+    
+    try:
+        async for ai_chunk in text_stream:
+            if not ai_chunk or ai_chunk.isspace():
+                continue
+            
+            text_parts.append(ai_chunk)
+            
+            # 发送AI生成的文字片段
+            if send_text is not None:
+                await send_text(ai_chunk)
+            
+            # 合并过小的片段，避免每个token都进行清理和分句
+            pending_delta += ai_chunk
+            if len(pending_delta) < MIN_SEGMENT_TRIGGER and not any(c in pending_delta for c in _SENTENCE_ENDINGS):
+                continue
+            
+            # 增量清理思考标签，只处理新增片段
+            cleaned_buffer += cleaner.feed(pending_delta)
+            pending_delta = ""
+            
+            # 只处理新增的部分，避免重复处理
+            if len(cleaned_buffer) > processed_text_length:
+                new_text = cleaned_buffer[processed_text_length:]
+                
+                # 优先在句子结束处切分，过长时在软分割符处强制切分
+                split_index = find_split_index(new_text)
+                if split_index >= 0:
+                    sentence_to_process = new_text[:split_index + 1].strip()
+                    
+                    if len(sentence_to_process) >= 3:
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("🎵 处理句子: %r", sentence_to_process[:100])
+                        await synthesizer.submit(sentence_to_process)
+                    
+                    # 更新已处理的文本长度
+                    processed_text_length += split_index + 1
+        
+        # 处理剩余的文本缓冲区
+        text_buffer = "".join(text_parts)
+        if text_parts:  # 只收集非空白片段，非空即有内容
+            # 输出尚未清理的片段和清理器中暂存的剩余文本
+            cleaned_buffer += cleaner.feed(pending_delta) + cleaner.flush()
+            
+            # 获取未处理的剩余文本
+            if len(cleaned_buffer) > processed_text_length:
+                remaining_text = cleaned_buffer[processed_text_length:].strip()
+                
+                if remaining_text and len(remaining_text) >= 3:
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("🔚 处理剩余文本: %r", remaining_text[:100])
+                    await synthesizer.submit(remaining_text, is_final=True)
+                else:
+                    logger.info("剩余文本太短或为空，跳过TTS合成")
+            else:
+                logger.info("所有文本已处理完毕，无剩余文本")
+    finally:
+        synthesizer.close()
+    
+    return text_buffer
+
+
+async def emit_speech_chunks(
+    synthesizer: OrderedSpeechSynthesizer,
+    send_audio: Callable[[SpeechChunk, int], Awaitable[None]],
+    send_error: Optional[Callable[[SpeechChunk], Awaitable[None]]] = None
+) -> int:
+    """
+    按句子顺序发送合成完成的音频块
+    
+    Args:
+        synthesizer: 并行语音合成器
+        send_audio: 发送音频块的回调，参数为语音块和音频块序号
+        send_error: 发送合成失败信息的回调，为None时只记录日志
+        
+    Returns:
+        int: 发送的音频块数量
+    """
+    chunk_counter = 0
+    
+    async for chunk in synthesizer.results():
+        if chunk.error is not None:
+            logger.error("❌ 句子TTS合成异常: %s, 文本: %r", chunk.error, chunk.text[:100])
+            if send_error is not None:
+                await send_error(chunk)
+        elif chunk.audio:
+            await send_audio(chunk, chunk_counter)
+            chunk_counter += 1
+            
+            logger.info("✅ 音频块 %d 发送成功: %d 字节", chunk_counter - 1, len(chunk.audio))
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info("⚠️ 句子TTS跳过: %r", chunk.text[:50])
+    
+    return chunk_counter
+
+
 # 便利函数，保持向后兼容性
 def clean_text_for_speech(text: str) -> str:
     """清理文本用于语音合成 - 便利函数"""
@@ -336,10 +739,9 @@ def validate_audio_data(audio_data: bytes) -> bool:
 
 def format_voice_response(success: bool, data: dict = None, error: str = None) -> dict:
     """格式化语音响应"""
-    import asyncio
     response = {
         "success": success,
-        "timestamp": asyncio.get_event_loop().time() if hasattr(asyncio, 'get_event_loop') else None
+        "timestamp": time.monotonic()
     }
     
     if success and data:
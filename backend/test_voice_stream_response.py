@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+流式语音聊天响应回归测试
+模拟语音识别、LM Studio流和TTS合成，验证 generate_streaming_response 会输出
+AI文字片段（ai_text）和音频块（audio_chunk）事件，不需要启动任何外部服务
+
+运行: pytest test_voice_stream_response.py
+"""
+
+import sys
+import os
+import asyncio
+import base64
+from unittest.mock import AsyncMock, patch
+
+import orjson
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import voice_stream_service as stream_module
+
+AI_CHUNKS = ("你好，很高兴见到你。", "<think>用户在打招呼</think>", "今天想聊点什么？")
+FAKE_AUDIO = b"fake-mp3-bytes"
+
+
+async def _fake_chat_completion_stream(chat_request):
+    """模拟LM Studio流式回复"""
+    for chunk in AI_CHUNKS:
+        yield chunk
+
+
+async def _collect(generator):
+    return [message async for message in generator]
+
+
+def _parse_events(messages):
+    """解析SSE消息，跳过结束标记"""
+    events = []
+    for message in messages:
+        assert message.startswith(b"data: ")
+        data = message[len(b"data: "):].strip()
+        if data != b"[DONE]":
+            events.append(orjson.loads(data))
+    return events
+
+
+def test_generate_streaming_response_emits_ai_text_and_audio_chunks():
+    service = stream_module.VoiceStreamService()
+    service.funaudio_service = AsyncMock()
+    service.funaudio_service.voice_recognition.return_value = {
+        "success": True,
+        "recognized_text": "你好",
+    }
+    
+    with patch.object(stream_module.lm_studio_service, "chat_completion_stream", _fake_chat_completion_stream), \
+         patch("app.utils.voice_utils.synthesize_speech_chunk", AsyncMock(return_value=FAKE_AUDIO)):
+        messages = asyncio.run(_collect(service.generate_streaming_response(b"audio", "test-session")))
+    
+    events = _parse_events(messages)
+    types = [event["type"] for event in events]
+    
+    assert "error" not in types
+    assert types[-1] == "complete"
+    
+    ai_text = [event["content"] for event in events if event["type"] == "ai_text"]
+    assert "".join(ai_text) == "".join(AI_CHUNKS)
+    
+    audio_chunks = [event for event in events if event["type"] == "audio_chunk"]
+    assert audio_chunks
+    assert [event["chunk_id"] for event in audio_chunks] == list(range(len(audio_chunks)))
+    assert all(base64.b64decode(event["audio"]) == FAKE_AUDIO for event in audio_chunks)
+    
+    # 思考标签内容不参与语音合成
+    spoken = "".join(event["text"] for event in audio_chunks)
+    assert "用户在打招呼" not in spoken
+    assert "今天想聊点什么" in spoken